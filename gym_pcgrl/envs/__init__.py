@@ -1 +1,2 @@
 from gym_pcgrl.envs.pcgrl_env import PcgrlEnv
+from gym_pcgrl.envs.vector_env import VectorPcgrlEnv
@@ -1,6 +1,9 @@
 """
 A helper module that can be used by all problems
 """
+from collections import Counter, deque
+from functools import lru_cache
+
 import numpy as np
 from nmmo import Terrain
 
@@ -17,12 +20,13 @@ Returns:
 
 
 def get_tile_locations(map, tile_values):
+    map = np.asarray(map)
     tiles = {}
     for t in tile_values:
-        tiles[t] = []
-    for y in range(len(map)):
-        for x in range(len(map[y])):
-            tiles[map[y][x]].append((x, y))
+        ys, xs = np.nonzero(map == t)
+        tiles[t] = list(zip(xs.tolist(), ys.tolist()))
+    if sum(len(locations) for locations in tiles.values()) != map.size:
+        raise KeyError(map[~np.isin(map, list(tile_values))].flat[0])
     return tiles
 
 
@@ -72,29 +76,21 @@ def get_floor_dist(map, fromTypes, floorTypes):
 
 
 """
-Get number of tiles that have certain value arround certain position
+Private function to get the slices that line up the tiles of an axis with the tiles d further
 
 Parameters:
-    map (any[][]): the current map
-    x (int): the x position of the start location
-    y (int): the y position of the start location
-    types (any[]): an array of types of tiles
-    relLocs ((int,int)[]): a tuple array of all the relative positions
+    d (int): the relative offset along the axis
+    length (int): the length of the axis
 
 Returns:
-    int: the number of similar tiles around a certain location
+    (slice, slice): the slice of the tiles and the slice of the tiles d further
 """
 
 
-def _calc_group_value(map, x, y, types, relLocs):
-    result = 0
-    for l in relLocs:
-        nx, ny = x + l[0], y + l[1]
-        if nx < 0 or ny < 0 or nx >= len(map[0]) or ny >= len(map):
-            continue
-        if map[ny][nx] in types:
-            result += 1
-    return result
+def _shifted(d, length):
+    if d >= 0:
+        return slice(0, length - d), slice(d, length)
+    return slice(-d, length), slice(0, length + d)
 
 
 """
@@ -113,14 +109,14 @@ Returns:
 
 
 def get_type_grouping(map, types, relLocs, min, max):
-    result = 0
-    for y in range(len(map)):
-        for x in range(len(map[y])):
-            if map[y][x] in types:
-                value = _calc_group_value(map, x, y, types, relLocs)
-                if value >= min and value <= max:
-                    result += 1
-    return result
+    mask = np.isin(np.asarray(map), list(types))
+    height, width = mask.shape
+    # values[y][x] counts the tiles of types at (x + dx, y + dy) for every relative location
+    values = np.zeros(mask.shape, dtype=int)
+    for dx, dy in relLocs:
+        (to_y, from_y), (to_x, from_x) = _shifted(dy, height), _shifted(dx, width)
+        values[to_y, to_x] += mask[from_y, from_x]
+    return int(np.count_nonzero(mask & (values >= min) & (values <= max)))
 
 
 """
@@ -136,23 +132,10 @@ Returns:
 
 
 def get_changes(map, vertical=False):
-    start_y = 0
-    start_x = 0
+    map = np.asarray(map)
     if vertical:
-        start_y = 1
-    else:
-        start_x = 1
-    value = 0
-    for y in range(start_y, len(map)):
-        for x in range(start_x, len(map[y])):
-            same = False
-            if vertical:
-                same = map[y][x] == map[y - 1][x]
-            else:
-                same = map[y][x] == map[y][x - 1]
-            if not same:
-                value += 1
-    return value
+        return int(np.count_nonzero(map[1:] != map[:-1]))
+    return int(np.count_nonzero(map[:, 1:] != map[:, :-1]))
 
 
 """
@@ -175,6 +158,57 @@ def _get_certain_tiles(map_locations, tile_values):
     return tiles
 
 
+"""
+Private function to get the flat indices of the 4-neighbours of every tile of a grid, tiles are
+numbered row by row, i.e. the tile (x, y) has the index y * width + x
+
+Parameters:
+    height (int): the height of the grid
+    width (int): the width of the grid
+
+Returns:
+    int[][]: the neighbour indices of every tile
+"""
+
+
+@lru_cache(maxsize=32)
+def _grid_neighbors(height, width):
+    neighbors = []
+    for i in range(height * width):
+        y, x = divmod(i, width)
+        neighbors.append(tuple(ny * width + nx for nx, ny in [(x - 1, y), (x + 1, y), (x, y - 1), (x, y + 1)]
+                               if 0 <= nx < width and 0 <= ny < height))
+    return tuple(neighbors)
+
+
+"""
+Private function that runs a breadth first search over the flat passable tiles
+
+Parameters:
+    start (int): the flat index of the start tile
+    passable (bool[]): the flat passability of every tile
+    neighbors (int[][]): the neighbour indices of every tile, see _grid_neighbors
+
+Returns:
+    Dict(int,int): the distance of every reached tile to the start in the order they were reached
+"""
+
+
+def _bfs(start, passable, neighbors):
+    if not passable[start]:
+        return {}
+    dist = {start: 0}
+    queue = deque([start])
+    while queue:
+        cur = queue.popleft()
+        d = dist[cur] + 1
+        for nxt in neighbors[cur]:
+            if passable[nxt] and nxt not in dist:
+                dist[nxt] = d
+                queue.append(nxt)
+    return dist
+
+
 """
 Private function that runs flood fill algorithm on the current color map
 
@@ -192,20 +226,82 @@ Returns:
 
 
 def _flood_fill(x, y, color_map, map, color_index, passable_values):
-    num_tiles = 0
-    queue = [(x, y)]
-    while len(queue) > 0:
-        (cx, cy) = queue.pop(0)
-        if color_map[cy][cx] != -1 or map[cy][cx] not in passable_values:
+    color_map = np.asarray(color_map)
+    height, width = color_map.shape
+    passable = (np.isin(np.asarray(map), list(passable_values)) & (color_map == -1)).ravel().tolist()
+    colored = list(_bfs(y * width + x, passable, _grid_neighbors(height, width)))
+    color_map.flat[colored] = color_index
+    return len(colored)
+
+
+"""
+Label the connected regions of passable tiles, regions are numbered from 1 in the order their
+first tile appears row by row
+
+Parameters:
+    map (any[][]): the current map
+    passable_values (any[]): an array of all the passable tile values
+
+Returns:
+    int[][]: the region of every tile, 0 for impassable tiles
+"""
+
+
+def get_region_labels(map, passable_values):
+    passable = np.isin(np.asarray(map), list(passable_values))
+    height, width = passable.shape
+    neighbors = _grid_neighbors(height, width)
+    flat = passable.ravel().tolist()
+    labels = [0] * len(flat)
+    region = 0
+    for start in range(len(flat)):
+        if not flat[start] or labels[start]:
             continue
-        num_tiles += 1
-        color_map[cy][cx] = color_index
-        for (dx, dy) in [(-1, 0), (1, 0), (0, -1), (0, 1)]:
-            nx, ny = cx + dx, cy + dy
-            if nx < 0 or ny < 0 or nx >= len(map[0]) or ny >= len(map):
-                continue
-            queue.append((nx, ny))
-    return num_tiles
+        region += 1
+        labels[start] = region
+        queue = deque([start])
+        while queue:
+            cur = queue.popleft()
+            for nxt in neighbors[cur]:
+                if flat[nxt] and not labels[nxt]:
+                    labels[nxt] = region
+                    queue.append(nxt)
+    return np.array(labels, dtype=int).reshape(height, width)
+
+
+"""
+Get the region of every location with a single labeling of the map, so the cost does not grow
+with the number of locations
+
+Parameters:
+    map (any[][]): the current map
+    locations ((int,int)[]): the (x, y) positions to look up
+    passable_values (any[]): an array of all the passable tile values
+
+Returns:
+    int[]: the region of every location, see get_region_labels, 0 for impassable locations
+"""
+
+
+def calc_location_regions(map, locations, passable_values):
+    labels = get_region_labels(map, passable_values)
+    return [int(labels[y][x]) for (x, y) in locations]
+
+
+"""
+Count the pairs of locations that share a passable region
+
+Parameters:
+    regions (int[]): the region of every location, see calc_location_regions
+
+Returns:
+    int: the number of connected pairs
+"""
+
+
+def calc_connected_pairs(regions):
+    counts = Counter(r for r in regions if r > 0)
+    return sum(c * (c - 1) // 2 for c in counts.values())
 
 
 """
@@ -223,15 +319,8 @@ Returns:
 
 def calc_num_regions(map, map_locations, passable_values):
     empty_tiles = _get_certain_tiles(map_locations, passable_values)
-    region_index = 0
-    color_map = np.full((len(map), len(map[0])), -1)
-    for (x, y) in empty_tiles:
-        num_tiles = _flood_fill(x, y, color_map, map, region_index + 1, passable_values)
-        if num_tiles > 0:
-            region_index += 1
-        else:
-            continue
-    return region_index
+    labels = get_region_labels(map, passable_values)
+    return len({labels[y][x] for (x, y) in empty_tiles} - {0})
 
 
 """
@@ -249,20 +338,12 @@ Returns:
 
 
 def run_dikjstra(x, y, map, passable_values):
-    dikjstra_map = np.full((len(map), len(map[0])), -1)
-    visited_map = np.zeros((len(map), len(map[0])))
-    queue = [(x, y, 0)]
-    while len(queue) > 0:
-        (cx, cy, cd) = queue.pop(0)
-        if map[cy][cx] not in passable_values or (dikjstra_map[cy][cx] >= 0 and dikjstra_map[cy][cx] <= cd):
-            continue
-        visited_map[cy][cx] = 1
-        dikjstra_map[cy][cx] = cd
-        for (dx, dy) in [(-1, 0), (1, 0), (0, -1), (0, 1)]:
-            nx, ny = cx + dx, cy + dy
-            if nx < 0 or ny < 0 or nx >= len(map[0]) or ny >= len(map):
-                continue
-            queue.append((nx, ny, cd + 1))
+    passable = np.isin(np.asarray(map), list(passable_values))
+    height, width = passable.shape
+    dist = _bfs(y * width + x, passable.ravel().tolist(), _grid_neighbors(height, width))
+    dikjstra_map = np.full((height, width), -1)
+    dikjstra_map.flat[list(dist)] = list(dist.values())
+    visited_map = (dikjstra_map >= 0).astype(float)
     return dikjstra_map, visited_map
 
 
@@ -281,18 +362,22 @@ Returns:
 
 def calc_longest_path(map, map_locations, passable_values):
     empty_tiles = _get_certain_tiles(map_locations, passable_values)
-    final_visited_map = np.zeros((len(map), len(map[0])))
+    passable = np.isin(np.asarray(map), list(passable_values))
+    height, width = passable.shape
+    neighbors = _grid_neighbors(height, width)
+    flat = passable.ravel().tolist()
+    visited = [False] * len(flat)
     final_value = 0
     for (x, y) in empty_tiles:
-        if final_visited_map[y][x] > 0:
+        if visited[y * width + x]:
             continue
-        dikjstra_map, visited_map = run_dikjstra(x, y, map, passable_values)
-        final_visited_map += visited_map
-        (my, mx) = np.unravel_index(np.argmax(dikjstra_map, axis=None), dikjstra_map.shape)
-        dikjstra_map, _ = run_dikjstra(mx, my, map, passable_values)
-        max_value = np.max(dikjstra_map)
-        if max_value > final_value:
-            final_value = max_value
+        dist = _bfs(y * width + x, flat, neighbors)
+        for i in dist:
+            visited[i] = True
+        # search again from the farthest tile, the first one row by row
+        farthest = max(dist.values(), default=-1)
+        dist = _bfs(min((i for i, d in dist.items() if d == farthest), default=0), flat, neighbors)
+        final_value = max(final_value, max(dist.values(), default=-1))
     return final_value
 
 
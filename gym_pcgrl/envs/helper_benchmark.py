@@ -0,0 +1,48 @@
+"""
+Timing of the array based graph algorithms of the helper module on growing maps, their results
+are checked against the former loop implementations in tests/test_helper.py.
+"""
+import time
+
+import numpy as np
+
+from gym_pcgrl.envs import helper
+
+# the relative locations of the 8-neighbourhood, as used for get_type_grouping
+NEIGHBORHOOD = [(dx, dy) for dy in (-1, 0, 1) for dx in (-1, 0, 1) if (dx, dy) != (0, 0)]
+
+
+"""
+Time the helper functions on growing maps
+
+Parameters:
+    sizes (int[]): the width and height of the maps
+    repeats (int): the number of calls per function and map
+    seed (int): the seed of the random maps
+
+Returns:
+    dict[]: the seconds per call of every function and map size
+"""
+def helper_scaling(sizes=(6, 16, 32, 64, 128), repeats=5, seed=0):
+    rng = np.random.default_rng(seed)
+    tiles = [0, 1, 2, 3]
+    # mostly passable maps, so the regions and paths span the map
+    passable = [0, 1, 2]
+    report = []
+    for size in sizes:
+        map = rng.choice(np.array(tiles), size=(size, size))
+        map_locations = helper.get_tile_locations(map, tiles)
+        x, y = map_locations[passable[0]][0]
+        cases = [("get_tile_locations", (map, tiles)),
+                 ("get_type_grouping", (map, passable, NEIGHBORHOOD, 2, 5)),
+                 ("get_changes", (map,)),
+                 ("calc_num_regions", (map, map_locations, passable)),
+                 ("run_dikjstra", (x, y, map, passable)),
+                 ("calc_longest_path", (map, map_locations, passable))]
+        for name, args in cases:
+            function = getattr(helper, name)
+            start = time.perf_counter()
+            for _ in range(repeats):
+                function(*args)
+            report.append({"function": name, "size": size, "seconds": (time.perf_counter() - start) / repeats})
+    return report
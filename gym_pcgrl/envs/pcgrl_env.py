@@ -55,6 +55,9 @@ class PcgrlEnv(gym.Env):
         self._prob = PROBLEMS[prob](**kwargs)
         self._rep = REPRESENTATIONS[rep](**kwargs)
         self._rep_stats = None
+        passable_values = self._prob.get_region_passable_values()
+        if passable_values is not None:
+            self._prob.regions = self._rep.track_regions(passable_values)
         self._iteration = 0
         self._changes = 0
         self._max_changes = max(int(0.2 * self._prob._width * self._prob._height), 8)
@@ -87,15 +90,29 @@ class PcgrlEnv(gym.Env):
     def reset(self, options=None, seed=None):
         self._changes = 0
         self._iteration = 0
+        self._prob.new_episode()
         self._rep.reset(self._prob._width, self._prob._height,
                         get_int_prob(self._prob._prob, self._prob.get_tile_types()))
+        self._rep.sync_regions()
         self._rep_stats = self._prob.get_stats(self._rep._map)  # without string map
 
         self._prob.reset(self._rep_stats)
 
         observation = self._rep.get_observation()
+        self.speculate()
         return observation, self.get_rep_stats()
 
+    """
+    Pass the map the next action could produce to the problem, so it can be evaluated while the
+    agent decides
+    """
+
+    def speculate(self):
+        if hasattr(self._rep, "get_candidate_map"):
+            candidate = self._rep.get_candidate_map()
+            if candidate is not None:
+                self._prob.speculate(candidate)
+
     """
     Get the border tile that can be used for padding
 
@@ -175,7 +192,11 @@ class PcgrlEnv(gym.Env):
         change, x, y = self._rep.update(action)
         if change > 0:
             self._changes += change
+            self._rep.sync_regions()
             self._rep_stats = self._prob.get_stats(self._rep._map)
+        recorder = getattr(self._rep, "recorder", None)
+        if recorder is not None and "balancing" in self._rep_stats:
+            recorder.set_balancing(self._rep_stats["balancing"])
 
         # calculate the values
         observation = self._rep.get_observation()
@@ -188,6 +209,8 @@ class PcgrlEnv(gym.Env):
         info["changes"] = self._changes
         info["max_iterations"] = self._max_iterations
         info["max_changes"] = self._max_changes
+        if not done:
+            self.speculate()
         return observation, reward, done, False, info
 
     """
@@ -222,12 +245,14 @@ class PcgrlEnv(gym.Env):
         if self.viewer:
             self.viewer.close()
             self.viewer = None
+        self._prob.close()
 
     def get_map(self):
         return self._rep._map
 
     def set_map(self, m):
         self._rep._map = m
+        self._rep.sync_regions()
         self._rep_stats = self._prob.get_stats(self._rep._map)  # without string map
 
     def get_rep_stats(self):
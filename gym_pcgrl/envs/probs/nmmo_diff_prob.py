@@ -1,5 +1,8 @@
+import asyncio
 import multiprocessing
 import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
 
 import numpy as np
 from PIL import Image
@@ -8,6 +11,14 @@ import nmmo
 from gym_pcgrl.envs.helper import get_range_reward
 from gym_pcgrl.envs.probs import Problem
 from gym_pcgrl.scripted import baselines
+from gym_pcgrl.scripted.decision_cache import FORAGE_CACHE
+from gym_pcgrl.simulation import ForageSimulator, SimulationCache, SimulationConfig, SimulationService
+from gym_pcgrl.simulation.early_stop import l1_bound, possible_values
+from gym_pcgrl.simulation.forage import GAME_SETTINGS
+from gym_pcgrl.simulation.fork import fork_runs, fork_supported
+from gym_pcgrl.simulation.profiles import profile_config
+from gym_pcgrl.simulation.seeding import reset_on_map, run_seeds, seed_globals
+from gym_pcgrl.simulation.symmetry import canonical_map, remap_winners
 from nmmo import Terrain
 
 nmmo.Env()
@@ -19,10 +30,14 @@ def spawn_pcgrl(config, *args):
     return [(y + config.MAP_BORDER + 1, x + config.MAP_BORDER + 1) for x, y in zip(pos_x, pos_y)]
 
 
+# agent of the balancing simulations, decides like baselines.ForageOnly with less overhead per tick
+SIM_AGENT = baselines.LeanForageOnly
+
+
 class ConfigSim(nmmo.config.Small, nmmo.config.AllGameSystems):
     SPECIALIZE = True
     COMBAT_SYSTEM_ENABLED = True
-    PLAYERS = [baselines.ForageOnly, baselines.ForageOnly]
+    PLAYERS = [SIM_AGENT, SIM_AGENT]
 
     PLAYER_N = 2
     PLAYER_DEATH_FOG = None
@@ -52,10 +67,132 @@ def ate_food(env, food_state):
     return food_state
 
 
+def rl_to_nmmo(a, conf, num_players):
+    terrain_idx_mapping = {0: Terrain.GRASS, 1: Terrain.FOREST, 2: Terrain.STONE,
+                           3: Terrain.WATER, 4: Terrain.GRASS, 5: Terrain.GRASS}  # 4,5 make player to grass
+
+    a = np.array(a)
+
+    conf.PLAYER_POSITIONS = [[], []]
+    for i in range(num_players):
+        y, x = np.where(a == (4 + i))
+        try:
+            conf.PLAYER_POSITIONS[0].append(y[0])
+            conf.PLAYER_POSITIONS[1].append(x[0])
+        except IndexError as e:
+            print(e)
+            print(a)
+            print(y, x)
+
+    masks = [a == k for k in terrain_idx_mapping.keys()]
+    for m, v in zip(masks, terrain_idx_mapping.values()):
+        a[m] = v
+
+    # add stone walls to create a border
+    a = np.pad(a, 1, "constant", constant_values=[Terrain.STONE])
+    a = np.pad(a, 6)
+    conf.MAP_NP = a
+
+
+def simulate_winner(env, conf, num_players, seed=None, reset=True):
+    # simulate the game for reward calculation
+
+    winners = []
+    # seeded runs are reproducible, nmmo draws from the global state and agents from AGENT_SEED
+    if seed is not None:
+        seed_globals(seed)
+    if not reset:
+        # the env was already reset on this map, e.g. before forking
+        env.config.AGENT_SEED = seed
+    else:
+        env.config.AGENT_SEED = seed
+        _ = env.reset()
+    if env.num_agents != num_players:
+        print("num_a", env.agents)
+        print(conf.PLAYER_POSITIONS)
+        print(env.realm.map.get_map())
+        print(spawn_pcgrl(conf))
+        raise ValueError(f"Not all players spawned, number agents does not equal {num_players}, is",
+                         env.agents)
+
+    # init game stats
+    food = {i + 1: {"v": 100, "eaten": 0} for i in range(num_players)}
+    running = True
+
+    while running:
+        # simulate one step in env
+        _ = env.step({})
+        # stopping to starvation
+        if env.num_agents <= 1:
+            if env.num_agents == 1:
+                winners.append(env.agents[0])
+            else:
+                # a draw lists every player, so it stays a draw under relabeled players
+                winners.extend(range(1, num_players + 1))
+            running = False
+
+        food = ate_food(env, food)
+        # stopping if agents ate 5 food
+        for player_id in food:
+            if food[player_id]["eaten"] >= 5:
+                winners.append(player_id)
+                running = False
+
+    del food
+    return winners
+
+
+DEFAULT_MAPS = {
+    2: np.array([[0, 2, 0, 3, 2, 0],
+                 [0, 0, 2, 0, 2, 0],
+                 [2, 0, 1, 2, 0, 1],
+                 [0, 0, 4, 5, 1, 1],
+                 [0, 0, 3, 0, 2, 1],
+                 [0, 2, 0, 0, 0, 3]]),
+    3: np.array([[0, 2, 0, 3, 2, 0],
+                 [0, 0, 2, 0, 2, 0],
+                 [2, 0, 1, 2, 0, 1],
+                 [0, 6, 4, 5, 1, 1],
+                 [0, 0, 3, 0, 2, 1],
+                 [0, 2, 0, 0, 0, 3]])
+}
+
+
+class NMMOSimulator:
+    """
+    Owns one warm nmmo.Env and simulates rl maps on it. Used by the workers of the
+    simulation pool, where it is built once per process.
+    """
+    def __init__(self, num_players=2, agent=SIM_AGENT, profile="all"):
+        self.num_players = num_players
+        self.conf = profile_config(ConfigSim, profile)()
+        self.conf.PLAYERS = [agent] * self.num_players
+        rl_to_nmmo(DEFAULT_MAPS[2 if num_players == 2 else 3], self.conf, self.num_players)
+        self.env = nmmo.Env(self.conf)
+        self.env.reset()
+
+    def simulate(self, map, runs, seeds=None):
+        rl_to_nmmo(map, self.conf, self.num_players)
+        self.env.realm.update_map(self.conf)
+        if seeds is None:
+            seeds = [None] * runs
+        return [simulate_winner(self.env, self.conf, self.num_players, seed) for seed in seeds]
+
+
+# simulators selectable through the sim_backend kwarg of NMMODiff
+SIM_BACKENDS = {"nmmo": NMMOSimulator, "numpy": ForageSimulator}
+
+
 # use this for different players encodings and n players
 class NMMODiff(Problem):
-    def __init__(self, width=6, height=6, balancing=0.5, num_players=2, init_random_map=False, b_method=1, sim_runs=10,
-                 **kwargs):
+    """
+    Parameters:
+        sim_config (SimulationConfig): the settings of the simulations
+        **kwargs: sim_* kwargs override single settings of sim_config, e.g. sim_runs=20, see
+        SimulationConfig for all of them
+    """
+    def __init__(self, width=6, height=6, balancing=0.5, num_players=2, init_random_map=False, b_method=1,
+                 sim_config=None, **kwargs):
         self.num_players = num_players
         super().__init__()
 
@@ -64,7 +201,30 @@ class NMMODiff(Problem):
 
         self._border_size = (0, 0)
         self._border_tile = "empty"
-        self.sim_runs = sim_runs
+        config = SimulationConfig.from_kwargs(kwargs, sim_config)
+        if config.backend not in SIM_BACKENDS:
+            raise ValueError(f"Unknown simulation backend {config.backend}, expected one of {list(SIM_BACKENDS)}")
+        if config.fork and config.speculative:
+            # speculation simulates on a background thread, forking a multithreaded process can deadlock
+            raise ValueError("sim_fork cannot be combined with sim_speculative")
+        # forking falls back to serial runs where it is not supported
+        self.sim_config = config.replace(fork=config.fork and fork_supported())
+        # owns the worker pool, the cache and the analyzer built from the config
+        self.simulation = SimulationService(self.sim_config, SIM_BACKENDS[config.backend], self.simulator_args(),
+                                            (height, width), num_players)
+        self._simulator = None
+        # game systems the nmmo simulations run with, see simulation.profiles.SIM_PROFILES
+        self._profile_config = profile_config(ConfigSim, config.profile)
+        # common random numbers, all maps of an episode are simulated with the same seeds so
+        # the reward compares paired outcomes of the old and the new map
+        self._crn_entropy = config.seed if config.seed is not None else np.random.SeedSequence().entropy
+        self._crn_episode = 0
+        self._crn_seed = None
+        if config.crn:
+            self.new_episode()
+        self._executor = None
+        self._speculation = None
+        self._sim_lock = threading.Lock()
 
         self.balancing = balancing
         self.init_random_map = init_random_map
@@ -81,26 +241,17 @@ class NMMODiff(Problem):
         self.init_prob()
 
         self.balanced = False
-        self.conf = ConfigSim()
-        self.conf.PLAYERS = [baselines.ForageOnly] * self.num_players
-
-        # initialize nmmo
-        if self.num_players == 2:
-            self.rl_to_nmmo(np.array([[0, 2, 0, 3, 2, 0],
-                                      [0, 0, 2, 0, 2, 0],
-                                      [2, 0, 1, 2, 0, 1],
-                                      [0, 0, 4, 5, 1, 1],
-                                      [0, 0, 3, 0, 2, 1],
-                                      [0, 2, 0, 0, 0, 3]]))
+        self.conf = self._profile_config()
+        self.conf.PLAYERS = [SIM_AGENT] * self.num_players
+        self._sim_agents = [p.__name__ for p in self.conf.PLAYERS]
+
+        # initialize nmmo, the numpy backend simulates without a realm
+        if self.sim_config.backend == "nmmo":
+            self.rl_to_nmmo(DEFAULT_MAPS[2 if self.num_players == 2 else 3])
+            self.nmmo_env = nmmo.Env(self.conf)
+            self.nmmo_env.reset()
         else:
-            self.rl_to_nmmo(np.array([[0, 2, 0, 3, 2, 0],
-                                      [0, 0, 2, 0, 2, 0],
-                                      [2, 0, 1, 2, 0, 1],
-                                      [0, 6, 4, 5, 1, 1],
-                                      [0, 0, 3, 0, 2, 1],
-                                      [0, 2, 0, 0, 0, 3]]))
-        self.nmmo_env = nmmo.Env(self.conf)
-        self.nmmo_env.reset()
+            self._simulator = SIM_BACKENDS[self.sim_config.backend](self.num_players)
         self.players = list(range(1, self.num_players + 1))
 
     def init_prob(self):
@@ -116,46 +267,9 @@ class NMMODiff(Problem):
             tiles.append(f"player{i + 1}")
         return tiles
 
-    def simulate_winner(self, idx):
+    def simulate_winner(self, idx, seed=None):
         # simulate the game for reward calculation
-
-        winners = []
-        steps = []
-        _ = self.nmmo_env.reset()
-        if self.nmmo_env.num_agents != self.num_players:
-            print("num_a", self.nmmo_env.agents)
-            print(self.conf.PLAYER_POSITIONS)
-            print(self.nmmo_env.realm.map.get_map())
-            print(spawn_pcgrl(self.conf))
-            raise ValueError(f"Not all players spawned, number agents does not equal {self.num_players}, is",
-                             self.nmmo_env.agents)
-
-        # init game stats
-        food = {i + 1: {"v": 100, "eaten": 0} for i in range(self.num_players)}
-        running = True
-
-        while running:
-            # simulate one step in env
-            _ = self.nmmo_env.step({})
-            # stopping to starvation
-            if self.nmmo_env.num_agents <= 1:
-                if self.nmmo_env.num_agents == 1:
-                    winners.append(self.nmmo_env.agents[0])
-                else:
-                    winners.extend([1, 2])
-                running = False
-
-            food = ate_food(self.nmmo_env, food)
-            # stopping if agents ate 5 food
-            for player_id in food:
-                if food[player_id]["eaten"] >= 5:
-                    winners.append(player_id)
-                    running = False
-
-        # env.close()
-        # del env
-        del food
-        return winners
+        return simulate_winner(self.nmmo_env, self.conf, self.num_players, seed)
 
     def calc_balancing1(self, winners):
         return round(sum(winners) / len(winners), 1) - 1
@@ -168,31 +282,373 @@ class NMMODiff(Problem):
         b = round(sum([abs(i - 1 / len(wr)) for i in wr]), 1)
         return b
 
-    def get_stats2(self, map, n_runs=10):
-        # convert pcgrl map to nmmo map, save it in conf object in MAP_NP
-        self.rl_to_nmmo(map)
-
-        pool = multiprocessing.Pool(n_runs)
-        results = pool.map(self.simulate_winner, range(self.sim_runs))
+    def get_sim_pool(self, processes=None):
+        # the pool is created once and reused for all following simulations
+        return self.simulation.get_pool(processes)
+
+    """
+    The arguments the simulation workers build their simulator from
+    """
+    def simulator_args(self):
+        if self.sim_config.backend == "nmmo":
+            return self.num_players, SIM_AGENT, self.sim_config.profile
+        return (self.num_players,)
+
+    def get_stats2(self, map, n_runs=10, seed=None):
+        self.get_sim_pool(n_runs)
+        seed = self.get_seed(seed)
+        return self.get_winner_stats(self.simulate(map, self.sim_config.runs, seed), seed)
+
+    """
+    Compute the stats from the winner lists of all simulation runs
+
+    Parameters:
+        results (int[][]): the winner list of every run
+        seed (int): the global seed the runs were simulated with, recorded with sim_crn so the
+        reward only pairs stats of the same seeds
+    """
+    def get_winner_stats(self, results, seed=None):
         winners = []
         for l in results:
             winners.extend(l)
 
         # balancing = round(sum(winners) / len(winners), 1) - 1
         balancing = self.b_method(winners)
-        del pool
-        return {"balancing": balancing, "winners": winners}
+        stats = {"balancing": balancing, "winners": winners, "sim_runs_used": len(results),
+                 "sim_profile": self.sim_config.profile}
+        if self.sim_config.crn:
+            stats["run_winners"] = list(results)
+            stats["crn_seed"] = seed
+        stats.update(self.simulation.stats())
+        if self.sim_config.backend == "nmmo" and self.simulation.pool is None:
+            stats.update(FORAGE_CACHE.stats("forage_cache"))
+        return stats
+
+    """
+    Everything besides the map and the SimulationConfig that the simulated winners depend on,
+    part of the cache key together with the whole config, see SimulationService.key
+    """
+    def sim_settings(self, runs, seed=None):
+        game = tuple(getattr(self._profile_config, name, None) for name in GAME_SETTINGS)
+        # where early stopping cuts the runs off also depends on the target
+        early_stop = None
+        if self.sim_config.early_stop:
+            early_stop = self.balancing, self.b_method.__name__
+        return self.num_players, runs, seed, tuple(self._sim_agents), game, early_stop
+
+    def get_seed(self, seed=None):
+        if seed is not None:
+            return seed
+        return self._crn_seed if self.sim_config.crn else self.sim_config.seed
+
+    def new_episode(self):
+        if self.sim_config.crn:
+            self._crn_seed = self.next_crn_seed()
+
+    """
+    Draw the common random numbers seed of a new episode, without making it the seed of the
+    problem, so callers with several episodes at once (VectorPcgrlEnv) can keep one per episode
+
+    Returns:
+        int: the seed, pass it explicitly to get_stats or get_stats_many
+    """
+    def next_crn_seed(self):
+        seq = np.random.SeedSequence([self._crn_entropy, self._crn_episode])
+        self._crn_episode += 1
+        return int(seq.generate_state(1)[0])
+
+    """
+    The seeds of the runs start..start + runs, independent of the map with common random numbers
+    """
+    def run_seeds(self, seed, map, runs, start=0):
+        return run_seeds(seed, None if self.sim_config.crn else map, runs, start)
+
+    """
+    Simulate a map with the selected backend, results are taken from the static analyzer or the
+    cache if enabled
+
+    Parameters:
+        map (int[][]): the rl map
+        runs (int): the number of simulation runs
+        seed (int): the global seed the seeds of the runs are derived from, None for random games
+
+    Returns:
+        int[][]: a winner list for every simulation run
+    """
+    def simulate(self, map, runs, seed=None):
+        if self.simulation.analyzer is not None:
+            results = self.simulation.analyzer.analyze(map, runs)
+            if results is not None:
+                return results
+
+        run = self.run_early_stop if self.sim_config.early_stop else self.run_simulations
+        if self.simulation.cache is None:
+            return run(map, runs, seed)
+
+        key, perm, canonical, results = self.cache_lookup(map, runs, seed)
+        if results is None:
+            results = self.cache_store(key, perm, run(canonical, runs, seed))
+        return results
+
+    """
+    Simulate in batches of sim_batch runs until the balancing is decided or all runs are done
+
+    Returns:
+        int[][]: a winner list for every simulated run, at most runs
+    """
+    def run_early_stop(self, map, runs, seed=None):
+        results = []
+        while len(results) < runs:
+            batch = min(self.sim_config.batch, runs - len(results))
+            results.extend(self.run_simulations(map, batch, seed, len(results)))
+            if self.is_decided(results, runs):
+                break
+        return results
+
+    """
+    Check if the remaining runs can still change the rounded balancing value, or with
+    sim_confidence set, if the target balancing is still plausible
+    """
+    def is_decided(self, results, runs):
+        remaining = runs - len(results)
+        if remaining <= 0:
+            return True
+        winners = [w for l in results for w in l]
+        values = possible_values(winners, remaining, self.num_players, self.b_method)
+        if values is not None and len(values) == 1:
+            return True
+        if self.sim_config.confidence is None:
+            return False
+
+        # the balancing changes at most by the l1 distance of the win rates (scaled for calc_balancing1)
+        eps = l1_bound(len(winners), self.num_players, self.sim_config.confidence)
+        if self.b_method == self.calc_balancing1:
+            eps *= (self.num_players - 1) / 2
+        return abs(self.b_method(winners) - self.balancing) > eps + 0.05
+
+    """
+    Look up the simulation results of a map in the cache. With sim_symmetry the cache holds
+    the results of the canonical map, a miss is simulated on the canonical map (with its seeds),
+    so all equivalent maps share the same games.
+
+    Returns:
+        str: the cache key
+        int[]: the player permutation from the canonical to the given map
+        int[][]: the map to simulate on a miss, the canonical map with sim_symmetry
+        int[][]: the winner lists translated to the given map, None on a miss
+    """
+    def cache_lookup(self, map, runs, seed=None):
+        perm = None
+        if self.sim_config.symmetry:
+            map, perm = canonical_map(map, self.num_players, relabel=self.b_method == self.calc_balancing2)
+        key = self.simulation.key(map, self.sim_settings(runs, seed))
+        results = self.simulation.cache.get(key)
+        if results is not None and perm is not None:
+            results = remap_winners(results, perm)
+        return key, perm, map, results
+
+    """
+    Store the results of the map returned by cache_lookup
+
+    Returns:
+        int[][]: the winner lists translated to the given map
+    """
+    def cache_store(self, key, perm, results):
+        self.simulation.cache.put(key, results)
+        if perm is not None:
+            results = remap_winners(results, perm)
+        return results
+
+    """
+    Simulate a map with the selected backend, seeded runs use the seeds of the run indices
+    start..start + runs
+    """
+    def run_simulations(self, map, runs, seed=None, start=0):
+        seeds = None if seed is None else self.run_seeds(seed, map, runs, start)
+        if self.simulation.remote:
+            return self.get_sim_pool().simulate(map, runs, seeds)
+        if self._simulator is not None:
+            return self._simulator.simulate(map, runs, seeds=seeds)
 
-    def get_stats(self, map):
         self.rl_to_nmmo(map)
         self.nmmo_env.realm.update_map(self.conf)
-
-        winners = []
-        for i in range(self.sim_runs):
-            winners.extend(self.simulate_winner(i))
-
-        balancing = self.b_method(winners)
-        return {"balancing": balancing, "winners": winners}  # , "end-reason": end_reason
+        if seeds is None:
+            seeds = [None] * runs
+        # only the main thread forks, the async api simulates on the background thread
+        if self.sim_config.fork and runs > 1 and threading.current_thread() is threading.main_thread():
+            return self.run_forked(map, seeds)
+        return [self.simulate_winner(i, s) for i, s in enumerate(seeds)]
+
+    """
+    Play the runs in children forked from the env reset on the map, runs whose child died
+    are played again serially, an exception in a child is raised here. Called from the main
+    thread only, see run_simulations.
+
+    Parameters:
+        map (int[][]): the rl map, already loaded into the env
+        seeds (int[]): the seed of every run, None entries for unseeded runs
+
+    Returns:
+        int[][]: a winner list for every run
+    """
+    def run_forked(self, map, seeds):
+        reset_on_map(self.nmmo_env, SimulationCache.key(map))
+
+        def run(seed):
+            if seed is None:
+                # the children would otherwise share the random state of the parent
+                seed_globals(None)
+            return simulate_winner(self.nmmo_env, self.conf, self.num_players, seed, reset=False)
+
+        results = fork_runs(run, seeds, self.sim_config.fork_children)
+        return [r if r is not None else self.simulate_winner(i, seeds[i]) for i, r in enumerate(results)]
+
+    """
+    Get the stats of several maps at once, the numpy backend simulates all of them in lockstep and
+    the shared memory pool keeps the jobs of all of them in flight
+
+    Parameters:
+        maps (int[][][]): the rl maps
+        seed (int): the global seed, defaults to sim_seed
+        seeds (int[]): the global seed of every map, e.g. the crn seeds of different episodes,
+        overrides seed
+
+    Returns:
+        dict[]: the stats of every map
+    """
+    def get_stats_many(self, maps, seed=None, seeds=None):
+        with self._sim_lock:
+            if seeds is None:
+                seeds = [seed] * len(maps)
+            seeds = [self.get_seed(s) for s in seeds]
+            runs = self.sim_config.runs
+            # the numpy backend and the shared memory pool take all maps at once
+            simulator = self._simulator
+            if self.simulation.remote:
+                simulator = self.get_sim_pool()
+            # the batch backends take either a seed for every map or none
+            mixed = None in seeds and any(s is not None for s in seeds)
+            if self.sim_config.early_stop or mixed or not hasattr(simulator, "simulate_many"):
+                return [self.get_winner_stats(self.simulate(map, runs, s), s) for map, s in zip(maps, seeds)]
+
+            results = [None] * len(maps)
+            keys = [None] * len(maps)
+            perms = [None] * len(maps)
+            # the maps to simulate, canonical with sim_symmetry
+            sim_maps = list(maps)
+            if self.simulation.analyzer is not None:
+                results = [self.simulation.analyzer.analyze(map, runs) for map in maps]
+            if self.simulation.cache is not None:
+                for i, map in enumerate(maps):
+                    if results[i] is None:
+                        keys[i], perms[i], sim_maps[i], results[i] = self.cache_lookup(map, runs, seeds[i])
+
+            missing = [i for i, r in enumerate(results) if r is None]
+            if len(missing) > 0:
+                run_seeds = None
+                if seeds[0] is not None:
+                    run_seeds = [self.run_seeds(seeds[i], sim_maps[i], runs) for i in missing]
+                simulated = simulator.simulate_many([sim_maps[i] for i in missing], runs, seeds=run_seeds)
+                for i, r in zip(missing, simulated):
+                    results[i] = r
+                    if self.simulation.cache is not None:
+                        results[i] = self.cache_store(keys[i], perms[i], r)
+            return [self.get_winner_stats(r, s) for r, s in zip(results, seeds)]
+
+    def get_stats(self, map, seed=None):
+        seed = self.get_seed(seed)
+        if self._speculation is not None:
+            key, speculated_seed, future = self._speculation
+            self._speculation = None
+            if key == np.asarray(map, dtype=np.uint8).tobytes() and speculated_seed == seed:
+                return future.result()
+            future.cancel()
+        return self.compute_stats(map, seed)
+
+    """
+    Get the stats of a map without blocking the event loop, so a single controller can keep
+    many maps in flight. Runs on a pool or the process scheduler are awaited directly, the
+    simulations in this process run on the one background thread of the problem.
+
+    Parameters:
+        map (int[][]): the rl map
+        seed (int): the global seed, defaults to sim_seed
+
+    Returns:
+        dict: the stats of the map, as returned by get_stats
+    """
+    async def get_stats_async(self, map, seed=None):
+        seed = self.get_seed(seed)
+        runs = self.sim_config.runs
+        if not self.sim_config.early_stop and self.simulation.remote:
+            pool = self.get_sim_pool()
+            results = None if self.simulation.analyzer is None else self.simulation.analyzer.analyze(map, runs)
+            key = perm = None
+            sim_map = map
+            if results is None and self.simulation.cache is not None:
+                key, perm, sim_map, results = self.cache_lookup(map, runs, seed)
+            if results is not None:
+                return self.get_winner_stats(results, seed)
+            if hasattr(pool, "simulate_async"):
+                seeds = None if seed is None else self.run_seeds(seed, sim_map, runs)
+                future = pool.simulate_async(sim_map, runs, seeds)
+            else:
+                # e.g. the shared memory pool, wait for it on the background thread
+                future = self.get_executor().submit(self.run_simulations, sim_map, runs, seed)
+        else:
+            return await asyncio.wrap_future(self.get_executor().submit(self.compute_stats, map, seed))
+
+        results = await asyncio.wrap_future(future)
+        if self.simulation.cache is not None:
+            results = self.cache_store(key, perm, results)
+        return self.get_winner_stats(results, seed)
+
+    """
+    Get the stats of several maps without blocking the event loop, see get_stats_async. Backends
+    that simulate many maps at once get all of them in one call.
+
+    Returns:
+        dict[]: the stats of every map
+    """
+    async def get_stats_many_async(self, maps, seed=None, seeds=None):
+        pool = self.simulation.pool
+        if self.simulation.remote:
+            pool = self.get_sim_pool()
+        if hasattr(pool, "simulate_async") and not self.sim_config.early_stop:
+            if seeds is None:
+                seeds = [seed] * len(maps)
+            return list(await asyncio.gather(*[self.get_stats_async(map, s) for map, s in zip(maps, seeds)]))
+        return await asyncio.wrap_future(self.get_executor().submit(self.get_stats_many, maps, seed, seeds))
+
+    def get_executor(self):
+        # the one background thread of the problem, shared by speculation and the async api
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=1)
+        return self._executor
+
+    def compute_stats(self, map, seed=None):
+        with self._sim_lock:
+            if self.sim_config.processes > 0:
+                return self.get_stats2(map, self.sim_config.processes, seed)
+            return self.get_winner_stats(self.simulate(map, self.sim_config.runs, seed), seed)
+
+    """
+    Start calculating the stats of a map in the background, a following get_stats call for the
+    same map reuses the result. A speculation that is not used is cancelled if it did not start
+    yet, otherwise its result only ends up in the simulation cache (if enabled).
+
+    Parameters:
+        map (int[][]): the map that will probably be evaluated next
+    """
+    def speculate(self, map):
+        if not self.sim_config.speculative:
+            return
+        if self._speculation is not None:
+            self._speculation[2].cancel()
+
+        map = np.array(map, dtype=np.uint8)
+        seed = self.get_seed()
+        self._speculation = (map.tobytes(), seed, self.get_executor().submit(self.compute_stats, map, seed))
 
     def get_reward_2players(self, new_stats, old_stats):
         # b_method1
@@ -212,8 +668,27 @@ class NMMODiff(Problem):
         return (round(old_stats["balancing"] - new_stats["balancing"], 2) * 10) + balancing_reward
 
     def get_reward(self, new_stats, old_stats):
+        if self.sim_config.crn:
+            new_stats, old_stats = self.get_paired_stats(new_stats, old_stats)
         return self.reward_function(new_stats, old_stats)
 
+    """
+    Recompute the balancing of the old and the new map over the runs both share, so the reward
+    compares outcomes simulated with the same seeds. Stats from different seed schedules are
+    returned unchanged.
+    """
+    def get_paired_stats(self, new_stats, old_stats):
+        if "run_winners" not in new_stats or "run_winners" not in old_stats or \
+                new_stats["crn_seed"] != old_stats["crn_seed"]:
+            return new_stats, old_stats
+
+        n = min(len(new_stats["run_winners"]), len(old_stats["run_winners"]))
+        paired = []
+        for stats in [new_stats, old_stats]:
+            winners = [w for l in stats["run_winners"][:n] for w in l]
+            paired.append({"balancing": self.b_method(winners), "winners": winners})
+        return paired[0], paired[1]
+
     def get_episode_over(self, new_stats, old_stats):
         return round(new_stats["balancing"], 1) == self.balancing
 
@@ -237,31 +712,15 @@ class NMMODiff(Problem):
 
     def reset(self, start_stats):
         super().reset(start_stats)
-        self.conf = ConfigSim()
+        self.conf = self._profile_config()
         self.conf.PLAYERS = [baselines.Forage] * self.num_players
 
     def rl_to_nmmo(self, a):
-        terrain_idx_mapping = {0: Terrain.GRASS, 1: Terrain.FOREST, 2: Terrain.STONE,
-                               3: Terrain.WATER, 4: Terrain.GRASS, 5: Terrain.GRASS}  # 4,5 make player to grass
-
-        a = np.array(a)
-
-        self.conf.PLAYER_POSITIONS = [[], []]
-        for i in range(self.num_players):
-            y, x = np.where(a == (4 + i))
-            try:
-                self.conf.PLAYER_POSITIONS[0].append(y[0])
-                self.conf.PLAYER_POSITIONS[1].append(x[0])
-            except IndexError as e:
-                print(e)
-                print(a)
-                print(y, x)
-
-        masks = [a == k for k in terrain_idx_mapping.keys()]
-        for m, v in zip(masks, terrain_idx_mapping.values()):
-            a[m] = v
-
-        # add stone walls to create a border
-        a = np.pad(a, 1, "constant", constant_values=[Terrain.STONE])
-        a = np.pad(a, 6)
-        self.conf.MAP_NP = a
+        rl_to_nmmo(a, self.conf, self.num_players)
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+            self._speculation = None
+        self.simulation.close()
@@ -3,6 +3,7 @@ from PIL import Image
 import numpy as np
 from gym_pcgrl.envs.probs import Problem
 from gym_pcgrl.envs.helper import get_range_reward, get_tile_locations, calc_certain_tile, calc_num_regions
+from gym_pcgrl.envs.helper import calc_connected_pairs, calc_location_regions
 from scipy.spatial.distance import cityblock
 import nmmo
 from nmmo import Terrain
@@ -28,13 +29,21 @@ class NMMOGen(Problem):
     def get_tile_types(self):
         return ["grass", "forest", "stone", "water", "player"]
 
+    def get_region_passable_values(self):
+        return ["stone", "forest", "player"]
+
+    def player_regions(self, m):
+        players_y, players_x = np.where(np.array(m) == 4) # "player"
+        if self.regions is not None:
+            # labels of the representation's map, only the tiles changed since are relabeled
+            self.regions.update(m)
+            return self.regions.location_regions(zip(players_x, players_y))
+        return calc_location_regions(m, zip(players_x, players_y), self.get_region_passable_values())
+
     def players_connected(self, m):
-        players = np.where(np.array(m) == 4) # "player"
-        if len(players[0]) == 2:
-            player1 = (players[1][0], players[0][0]) #(x,y)
-            player2 = (players[1][1], players[0][1]) #(x,y)
-            dikjstra = run_dikjstra(x=player1[0], y=player1[1], map=m, passable_values=["stone", "forest", "player"])[0] #0,1,4
-            if dikjstra[player2[1]][player2[0]] == -1:
+        regions = self.player_regions(m)
+        if len(regions) == 2:
+            if calc_connected_pairs(regions) == 0:
                 return -1
             return 1
         return 0
@@ -97,6 +106,12 @@ class NMMOGenNPlayers(NMMOGen):
     def __init__(self, width=6, height=6, num_players=2, init_random_map=False, *args, **kwargs):
         super().__init__(width, height, num_players, init_random_map)
         self._prob = {"grass": 0.45, "forest": 0.25, "stone": 0.075, "water": 0.15, "player": 0.075}
+        # players-connected counts the connected pairs like the sum of connected() over the pairs,
+        # all players are connected at N*(N-1)/2, i.e. at num_players = 3 pairs for 3 players
+        self.num_pairs = num_players * (num_players - 1) // 2
+
+    def get_region_passable_values(self):
+        return [0, 1, 4]
         
     def connected(self, player_a, player_b, m):
         dikjstra = run_dikjstra(x=player_a[0], y=player_a[1], map=m, passable_values=[0, 1, 4])[0] #0,1,4
@@ -105,26 +120,21 @@ class NMMOGenNPlayers(NMMOGen):
         return 1
     
     def players_connected(self, m):
-        players_y, players_x = np.where(np.array(m) == 4) # "player"
-        connections = []
-        if len(players_y) == self.num_players:
-            connections.append(self.connected((players_x[0], players_y[0]), (players_x[1], players_y[1]), m))
-            connections.append(self.connected((players_x[0], players_y[0]), (players_x[2], players_y[2]), m))
-            connections.append(self.connected((players_x[2], players_y[2]), (players_x[1], players_y[1]), m))
-            #if sum(connections) == self.n_players
-            #        return 1
-            #return -1
-            return sum(connections)
+        # one labeling of the map answers the connectivity of every pair of players, the count
+        # equals the sum of connected() (0 or 1) over all pairs
+        regions = self.player_regions(m)
+        if len(regions) == self.num_players:
+            return calc_connected_pairs(regions)
         return 0
     
     
     def get_reward(self, new_stats, old_stats):
         rewards = {
             "num-players": get_range_reward(new_stats["num-players"], old_stats["num-players"], self.num_players, self.num_players),
-            "players-connected": get_range_reward(new_stats["players-connected"], old_stats["players-connected"], self.num_players, self.num_players)
+            "players-connected": get_range_reward(new_stats["players-connected"], old_stats["players-connected"], self.num_pairs, self.num_pairs)
         }
         return rewards["num-players"] * 3 + rewards["players-connected"] * 2
     
     def get_episode_over(self, new_stats, old_stats):
         # print(new_stats)
-        return new_stats["num-players"] == self.num_players and new_stats["players-connected"] == self.num_players
\ No newline at end of file
+        return new_stats["num-players"] == self.num_players and new_stats["players-connected"] == self.num_pairs
\ No newline at end of file
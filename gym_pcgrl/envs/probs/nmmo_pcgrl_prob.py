@@ -7,6 +7,7 @@ from scipy.spatial.distance import cityblock
 import nmmo
 from nmmo import Terrain
 from gym_pcgrl.scripted import baselines
+from gym_pcgrl.simulation.profiles import profile_config
 from random import random
 import pandas as pd
 import multiprocessing
@@ -72,9 +73,10 @@ class NMMO_PCGRL(Problem):
         self._border_tile = "stone"
         b_methods = [NMMO_PCGRL.calc_balancing1, NMMO_PCGRL.calc_balancing2]
         self.b_method = b_methods[b_method]
+        self.sim_profile = kwargs.get("sim_profile", "all")
         
         self.balanced = False
-        self.conf = ConfigSim()
+        self.conf = profile_config(ConfigSim, self.sim_profile)()
         nmmo.Env(self.conf)
 
     def get_tile_types(self):
@@ -156,7 +158,7 @@ class NMMO_PCGRL(Problem):
         #balancing = round(sum(winners) / len(winners), 1) - 1
         balancing = self.b_method(winners)
         del pool
-        return {"balancing": balancing, "num-players": 2}
+        return {"balancing": balancing, "num-players": 2, "sim_profile": self.sim_profile}
     
     def get_reward(self, new_stats, old_stats):
         num_player_reward = get_range_reward(new_stats["num-players"], old_stats["num-players"], 2, 2)
@@ -188,7 +190,7 @@ class NMMO_PCGRL(Problem):
     
     def reset(self, start_stats):
         super().reset(start_stats)
-        self.conf = ConfigSim()
+        self.conf = profile_config(ConfigSim, self.sim_profile)()
         
     def rl_to_nmmo(self, a, path=None):
         # GRASS 2, STONE 5, FOREST 4, WATER 1
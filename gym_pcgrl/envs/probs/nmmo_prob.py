@@ -6,7 +6,8 @@ from gym_pcgrl.envs.helper import get_range_reward
 import nmmo
 from nmmo import Terrain
 from gym_pcgrl.scripted import baselines
-import multiprocessing
+from gym_pcgrl.simulation import SimulationPool
+from gym_pcgrl.simulation.profiles import profile_config
 
 
 def spawn_pcgrl(config, *args):
@@ -49,6 +50,71 @@ def ate_food(env, food_state):
     return food_state
 
 
+def rl_to_nmmo(a, conf):
+    # GRASS 2, STONE 5, FOREST 4, WATER 1
+    terrain_idx_mapping = {0: Terrain.GRASS, 1: Terrain.FOREST, 2: Terrain.STONE,
+                           3: Terrain.WATER, 4: Terrain.GRASS, 5: Terrain.GRASS}  # 4,5 make player to grass
+
+    a = np.array(a)
+    players = np.where(a == 4)
+
+    conf.PLAYER_POSITIONS = [players[1], players[0]]
+    masks = [a == k for k in terrain_idx_mapping.keys()]
+    for m, v in zip(masks, terrain_idx_mapping.values()):
+        a[m] = v
+
+    # add stone wall
+    a = np.pad(a, 1, "constant", constant_values=[Terrain.STONE])
+    a = np.pad(a, 6)
+    conf.MAP_NP = a
+
+
+def simulate_winner(env):
+    winners = []
+    _ = env.reset()
+
+    food = {1: {"v": 100, "eaten": 0}, 2: {"v": 100, "eaten": 0}}
+    running = True
+
+    while running:
+        # simulate one step in env
+        _ = env.step({})
+        # stopping to starvation
+        if env.num_agents <= 1:
+            if env.num_agents == 1:
+                winners.append(env.agents[0])
+            else:
+                winners.extend([1, 2])
+            running = False
+
+        food = ate_food(env, food)
+        # stopping if agents ate 10 food
+        for player_id in food:
+            if food[player_id]["eaten"] >= 5:
+                winners.append(player_id)
+                running = False
+
+    del food
+    return winners
+
+
+class NMMOSimulator:
+    """
+    Owns one warm nmmo.Env per worker process of the simulation pool.
+    """
+    def __init__(self, profile="all"):
+        self.conf = profile_config(ConfigSim, profile)()
+        self.env = None
+
+    def simulate(self, map, runs):
+        rl_to_nmmo(map, self.conf)
+        if self.env is None:
+            self.env = nmmo.Env(self.conf)
+        else:
+            self.env.realm.update_map(self.conf)
+        return [simulate_winner(self.env) for _ in range(runs)]
+
+
 class NMMO(Problem):
     def __init__(self, width=6, height=6, balancing=1, num_players=2, init_random_map=False, b_method=1, **kwargs):
         super().__init__()
@@ -63,45 +129,23 @@ class NMMO(Problem):
         self.num_players = num_players
         self.init_random_map = init_random_map
         self.sim_runs = kwargs["sim_runs"]
+        self.sim_profile = kwargs.get("sim_profile", "all")
         self._border_tile = "stone"
         b_methods = [NMMO.calc_balancing1, NMMO.calc_balancing2]
         self.b_method = b_methods[b_method]
 
         self.balanced = False
-        self.conf = ConfigSim()
+        self.conf = profile_config(ConfigSim, self.sim_profile)()
         nmmo.Env(self.conf)
+        self._sim_pool = None
 
     def get_tile_types(self):
         return ["grass", "forest", "stone", "water", "player"]  # tree
 
     def simulate_winner(self, idx, env):
-        winners = []
-        steps = []
-        _ = env.reset()
-
-        food = {1: {"v": 100, "eaten": 0}, 2: {"v": 100, "eaten": 0}}
-        running = True
-
-        while running:
-            # simulate one step in env
-            _ = env.step({})
-            # stopping to starvation
-            if env.num_agents <= 1:
-                if env.num_agents == 1:
-                    winners.append(env.agents[0])
-                else:
-                    winners.extend([1, 2])
-                running = False
-
-            food = ate_food(env, food)
-            # stopping if agents ate 10 food
-            for player_id in food:
-                if food[player_id]["eaten"] >= 5:
-                    winners.append(player_id)
-                    running = False
-
+        winners = simulate_winner(env)
         env.close()
-        del env, food
+        del env
         return winners
 
     @staticmethod
@@ -118,18 +162,16 @@ class NMMO(Problem):
         return b
 
     def get_stats2(self, map, n_runs=14):
-        # convert pcgrl map to nmmo map, save it in conf object in MAP_NP
-        self.rl_to_nmmo(map)
-
-        pool = multiprocessing.Pool(n_runs)
-        results = pool.map(self.simulate_winner, range(self.sim_runs))
+        # the warm pool is created once and reused for all following maps
+        if self._sim_pool is None:
+            self._sim_pool = SimulationPool(NMMOSimulator, (self.sim_profile,), processes=n_runs)
+        results = self._sim_pool.simulate(map, self.sim_runs)
         winners = []
         for l in results:
             winners.extend(l)
 
         balancing = self.b_method(winners)
-        del pool
-        return {"balancing": balancing, "winners": winners}
+        return {"balancing": balancing, "winners": winners, "sim_profile": self.sim_profile}
 
     def get_stats(self, map, n_runs=14):
         self.rl_to_nmmo(map)
@@ -140,7 +182,7 @@ class NMMO(Problem):
             winners.extend(self.simulate_winner(i, env))
         balancing = self.b_method(winners)
         del env
-        return {"balancing": balancing, "winners": winners}  # , "end-reason": end_reason
+        return {"balancing": balancing, "winners": winners, "sim_profile": self.sim_profile}  # , "end-reason": end_reason
 
     def get_reward(self, new_stats, old_stats):
         old_balancing = abs(int(old_stats["balancing"] * 10) - 5)
@@ -179,22 +221,12 @@ class NMMO(Problem):
 
     def reset(self, start_stats):
         super().reset(start_stats)
-        self.conf = ConfigSim()
+        self.conf = profile_config(ConfigSim, self.sim_profile)()
 
     def rl_to_nmmo(self, a, path=None):
-        # GRASS 2, STONE 5, FOREST 4, WATER 1
-        terrain_idx_mapping = {0: Terrain.GRASS, 1: Terrain.FOREST, 2: Terrain.STONE,
-                               3: Terrain.WATER, 4: Terrain.GRASS, 5: Terrain.GRASS}  # 4,5 make player to grass
-
-        a = np.array(a)
-        players = np.where(a == 4)
-
-        self.conf.PLAYER_POSITIONS = [players[1], players[0]]
-        masks = [a == k for k in terrain_idx_mapping.keys()]
-        for m, v in zip(masks, terrain_idx_mapping.values()):
-            a[m] = v
-
-        # add stone wall
-        a = np.pad(a, 1, "constant", constant_values=[Terrain.STONE])
-        a = np.pad(a, 6)
-        self.conf.MAP_NP = a
+        rl_to_nmmo(a, self.conf)
+
+    def close(self):
+        if self._sim_pool is not None:
+            self._sim_pool.close()
+            self._sim_pool = None
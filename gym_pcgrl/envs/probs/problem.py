@@ -20,6 +20,8 @@ class Problem:
         self._border_tile = tiles[0]
         self._tile_size=16
         self._graphics = None
+        # region labels of the representation's map, see get_region_passable_values
+        self.regions = None
 
     """
     Seeding the used random variable to get the same result. If the seed is None,
@@ -45,6 +47,33 @@ class Problem:
     def reset(self, start_stats):
         self._start_stats = start_stats
 
+    """
+    Called by the environment at the start of every episode, before the stats of the
+    starting map are calculated
+    """
+    def new_episode(self):
+        pass
+
+    """
+    Hint that the stats of a map are likely requested next, e.g. the swap candidate of the
+    representation. Problems can start calculating them in the background.
+
+    Parameters:
+        map (int[][]): the map that will probably be evaluated next
+    """
+    def speculate(self, map):
+        pass
+
+    """
+    Get the passable tile values of the map regions the stats depend on. The environment then
+    keeps a RegionLabels of the representation's map in self.regions up to date.
+
+    Returns:
+        any[]: the passable tile values, None if the problem does not use regions
+    """
+    def get_region_passable_values(self):
+        return None
+
     """
     Get a list of all the different tile names
 
@@ -121,6 +150,12 @@ class Problem:
     def get_debug_info(self, new_stats, old_stats):
         raise NotImplementedError('get_debug_info is not implemented')
 
+    """
+    Release any resources held by the problem (e.g. simulation workers)
+    """
+    def close(self):
+        pass
+
     """
     Get an image on how the map will look like for a specific map
 
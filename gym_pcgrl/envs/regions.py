@@ -0,0 +1,144 @@
+from collections import Counter
+
+import numpy as np
+
+from gym_pcgrl.envs.helper import get_region_labels
+
+"""
+Region labels that follow a map through single tile edits. Opening a tile joins the regions
+around it and closing a tile only shrinks its region, unless its passable neighbours are not
+connected around it, the only case in which a region can split and all labels are recomputed.
+"""
+
+# the 8 tiles around a tile in clockwise order, consecutive ones are 4-neighbours of each other
+_RING = [(0, -1), (1, -1), (1, 0), (1, 1), (0, 1), (-1, 1), (-1, 0), (-1, -1)]
+
+
+class RegionLabels:
+    """
+    The passable regions of a map. The ids of the regions are arbitrary but stay the same while
+    the regions do, two tiles are connected if and only if they have the same id above 0.
+
+    Parameters:
+        map (any[][]): the map to label, it is copied
+        passable_values (any[]): an array of all the passable tile values
+    """
+    def __init__(self, map, passable_values):
+        self.passable_values = list(passable_values)
+        self.recomputes = 0
+        self.edits = 0
+        self.recompute(map)
+
+    """
+    Label the map from scratch
+
+    Parameters:
+        map (any[][]): the new map
+    """
+    def recompute(self, map):
+        self.map = np.array(map)
+        if self.map.dtype.kind == "U":
+            # fixed width strings would cut longer tile names set later
+            self.map = self.map.astype(object)
+        self.labels = get_region_labels(self.map, self.passable_values)
+        self._sizes = Counter(self.labels[self.labels > 0].tolist())
+        self._next = int(self.labels.max(initial=0)) + 1
+        self.recomputes += 1
+
+    """
+    Bring the labels up to date with a map, only the tiles that differ are edited
+
+    Parameters:
+        map (any[][]): the current map
+    """
+    def update(self, map):
+        map = np.asarray(map)
+        if map.shape != self.map.shape:
+            self.recompute(map)
+            return
+        ys, xs = np.nonzero(map != self.map)
+        for x, y in zip(xs.tolist(), ys.tolist()):
+            self.set_tile(x, y, map[y][x])
+
+    """
+    Change one tile of the map and update the labels
+
+    Parameters:
+        x (int): the x position of the tile
+        y (int): the y position of the tile
+        value (any): the new tile value
+    """
+    def set_tile(self, x, y, value):
+        was_passable = self.labels[y][x] > 0
+        self.map[y][x] = value
+        passable = value in self.passable_values
+        if passable == was_passable:
+            return
+        self.edits += 1
+        if passable:
+            self._open(x, y)
+        else:
+            self._close(x, y)
+
+    def _open(self, x, y):
+        height, width = self.labels.shape
+        regions = {self.labels[ny][nx] for nx, ny in [(x - 1, y), (x + 1, y), (x, y - 1), (x, y + 1)]
+                   if 0 <= nx < width and 0 <= ny < height and self.labels[ny][nx] > 0}
+        if not regions:
+            region = self._next
+            self._next += 1
+        else:
+            # the smaller regions join the largest one
+            region = max(regions, key=lambda r: self._sizes[r])
+            for other in regions - {region}:
+                self.labels[self.labels == other] = region
+                self._sizes[region] += self._sizes.pop(other)
+        self.labels[y][x] = region
+        self._sizes[region] += 1
+
+    def _close(self, x, y):
+        region = self.labels[y][x]
+        self.labels[y][x] = 0
+        self._sizes[region] -= 1
+        if self._sizes[region] == 0:
+            del self._sizes[region]
+        if not self._connected_around(x, y):
+            self.recompute(self.map)
+
+    def _connected_around(self, x, y):
+        height, width = self.labels.shape
+        ring = [0 <= x + dx < width and 0 <= y + dy < height and self.labels[y + dy][x + dx] > 0
+                for dx, dy in _RING]
+        if sum(ring[0::2]) < 2:
+            return True
+        if all(ring):
+            return True
+        # every run of passable ring tiles is connected, the 4-neighbours have to share one run
+        start = ring.index(False)
+        runs = 0
+        with_neighbour = False
+        for i in range(start + 1, start + len(ring) + 1):
+            if ring[i % len(ring)]:
+                with_neighbour = with_neighbour or i % 2 == 0
+            else:
+                runs += with_neighbour
+                with_neighbour = False
+        return runs <= 1
+
+    """
+    Get the region of a tile
+
+    Returns:
+        int: the id of the region, 0 for impassable tiles
+    """
+    def region(self, x, y):
+        return int(self.labels[y][x])
+
+    """
+    Get the region of every location, see calc_location_regions
+    """
+    def location_regions(self, locations):
+        return [int(self.labels[y][x]) for (x, y) in locations]
+
+    def stats(self):
+        return {"region_recomputes": self.recomputes, "region_edits": self.edits}
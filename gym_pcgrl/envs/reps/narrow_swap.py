@@ -6,17 +6,28 @@ from nmmo import Terrain
 from collections import OrderedDict
 from PIL import Image
 from numpy.random import randint
+from gym_pcgrl.envs.reps.swap_recorder import SwapRecorder
 
 
 
 class NarrowSwapRepresentation(Representation):
-    def __init__(self, init_random_map=True, num_players=2, **kwargs):
+    def __init__(self, init_random_map=True, num_players=2, record_swaps=False, **kwargs):
         super().__init__()
         self.init_random_map = init_random_map
         self.num_players = num_players
         self.width = kwargs["width"]
         self.height = kwargs["height"]
-        self.save = {"maps": [], "pos1": [], "pos2": [], "action": []}
+        # opt-in trajectory of the episode, see SwapRecorder
+        self.recorder = SwapRecorder() if record_swaps else None
+
+    """
+    The recorded episode with the map after every step, empty if recording is off
+    """
+    @property
+    def save(self):
+        if self.recorder is None:
+            return {"maps": [], "pos1": [], "pos2": [], "action": []}
+        return self.recorder.legacy_save(maps_after=True)
 
     def get_action_space(self, width, height, num_tiles):
         return spaces.Discrete(2)
@@ -35,7 +46,6 @@ class NarrowSwapRepresentation(Representation):
         })
 
     def reset(self, width, height, prob):
-        self.save = {"maps": [], "pos1": [], "pos2": [], "action": []}
         self._x1 = randint(width)
         self._y1 = randint(height)
         self._x2 = randint(width)
@@ -52,6 +62,22 @@ class NarrowSwapRepresentation(Representation):
             self._old_map = self._map.copy().astype(np.uint8)
         else:
             self._map = self._old_map.copy().astype(np.uint8)
+        if self.recorder is not None:
+            self.recorder.start(self._map)
+
+    """
+    The map that action 1 would produce with the current positions
+
+    Returns:
+        int[][]: the swapped map, None if swapping does not change the map
+    """
+    def get_candidate_map(self):
+        x1, y1, x2, y2 = self._x1, self._y1, self._x2, self._y2
+        if self._map[y1][x1] == self._map[y2][x2]:
+            return None
+        candidate = self._map.copy()
+        candidate[y1][x1], candidate[y2][x2] = self._map[y2][x2], self._map[y1][x1]
+        return candidate
 
     def update(self, action):
         x1, y1, x2, y2 = self._x1, self._y1, self._x2, self._y2
@@ -62,11 +88,6 @@ class NarrowSwapRepresentation(Representation):
 
         # swap (is only 1 integer)
         elif action == 1:
-            # saving stats, only change=True
-            #self.save["maps"].append(self._map.copy())
-            #self.save["pos1"].append([x1, y1])
-            #self.save["pos2"].append([x2, y2])
-            
             tmp = self._map[y1][x1]
             self._map[y1][x1] = self._map[y2][x2]
             self._map[y2][x2] = tmp
@@ -74,11 +95,9 @@ class NarrowSwapRepresentation(Representation):
         else:
             change = False
             
-        # save all actions, also change=False
-        self.save["maps"].append(self._map.copy())
-        self.save["pos1"].append([x1, y1])
-        self.save["pos2"].append([x2, y2])
-        self.save["action"].append(change)
+        # record all actions, also change=False
+        if self.recorder is not None:
+            self.recorder.record(x1, y1, x2, y2, change)
         
         # new random positions
         self._x1 = randint(self.width) #self._random.randint(self.width)
@@ -1,5 +1,7 @@
+import numpy as np
 from gymnasium.utils import seeding
 from gym_pcgrl.envs.helper import gen_random_map
+from gym_pcgrl.envs.regions import RegionLabels
 
 """
 The base class of all the representations
@@ -12,6 +14,7 @@ class Representation:
         self._random_start = True
         self._map = None
         self._old_map = None
+        self.regions = None
 
         self.seed()
 
@@ -44,6 +47,28 @@ class Representation:
         else:
             self._map = self._old_map.copy()
 
+    """
+    Keep region labels of the map, updated by sync_regions after every change of the map
+
+    Parameters:
+        passable_values (any[]): an array of all the passable tile values
+
+    Returns:
+        RegionLabels: the labels, they are created with the first map
+    """
+    def track_regions(self, passable_values):
+        self.regions = RegionLabels(np.zeros((0, 0)), passable_values)
+        if self._map is not None:
+            self.regions.update(self._map)
+        return self.regions
+
+    """
+    Bring the region labels up to date with the map, only the changed tiles are relabeled
+    """
+    def sync_regions(self):
+        if self.regions is not None and self._map is not None:
+            self.regions.update(self._map)
+
     """
     Adjust current representation parameter
 
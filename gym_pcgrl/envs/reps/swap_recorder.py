@@ -0,0 +1,127 @@
+import numpy as np
+
+"""
+Compact trajectories of the swap representations. Instead of a copy of the map per step, the
+recorder keeps the map of the episode start once and one record per step, any map of the
+episode is rebuilt by replaying the swaps.
+"""
+
+# one step: the swapped positions, if the map changed and the balancing of the map after it
+STEP_DTYPE = np.dtype([("x1", np.int16), ("y1", np.int16), ("x2", np.int16), ("y2", np.int16),
+                       ("changed", np.bool_), ("balancing", np.float32)])
+
+
+class SwapRecorder:
+    """
+    Records the swaps of an episode
+
+    Parameters:
+        capacity (int): the number of steps preallocated, the storage doubles when it is full
+    """
+    def __init__(self, capacity=128):
+        self.initial_map = None
+        self._steps = np.zeros(capacity, dtype=STEP_DTYPE)
+        self._length = 0
+
+    """
+    Start a new episode
+
+    Parameters:
+        map (int[][]): the map at the start of the episode, it is copied
+    """
+    def start(self, map):
+        self.initial_map = np.array(map, dtype=np.uint8)
+        self._length = 0
+
+    """
+    Record one step, the balancing is unknown (nan) until set with set_balancing
+
+    Parameters:
+        x1 (int): the x position of the first tile
+        y1 (int): the y position of the first tile
+        x2 (int): the x position of the second tile
+        y2 (int): the y position of the second tile
+        changed (bool): if the tiles were swapped
+    """
+    def record(self, x1, y1, x2, y2, changed):
+        if self._length == len(self._steps):
+            self._steps = np.concatenate([self._steps, np.zeros(len(self._steps), dtype=STEP_DTYPE)])
+        self._steps[self._length] = (x1, y1, x2, y2, changed, np.nan)
+        self._length += 1
+
+    """
+    Set the balancing of the map after the last recorded step
+    """
+    def set_balancing(self, balancing):
+        if self._length > 0:
+            self._steps["balancing"][self._length - 1] = balancing
+
+    def __len__(self):
+        return self._length
+
+    """
+    The records of all steps of the episode, a view of the storage
+
+    Returns:
+        numpy.ndarray: the records with the fields of STEP_DTYPE
+    """
+    @property
+    def steps(self):
+        return self._steps[:self._length]
+
+    """
+    Rebuild the map after a number of steps
+
+    Parameters:
+        step (int): the number of steps, 0 for the map at the start of the episode
+
+    Returns:
+        int[][]: the map after step steps
+    """
+    def map_at(self, step):
+        map = self.initial_map.copy()
+        for x1, y1, x2, y2, changed, _ in self._steps[:step]:
+            if changed:
+                map[y1][x1], map[y2][x2] = map[y2][x2], map[y1][x1]
+        return map
+
+    """
+    Rebuild the maps after every step in one pass
+
+    Returns:
+        int[][][]: the map after each of the len(self) steps
+    """
+    def maps(self):
+        map = self.initial_map.copy()
+        maps = np.empty((self._length,) + map.shape, dtype=map.dtype)
+        for i, (x1, y1, x2, y2, changed, _) in enumerate(self.steps):
+            if changed:
+                map[y1][x1], map[y2][x2] = map[y2][x2], map[y1][x1]
+            maps[i] = map
+        return maps
+
+    """
+    The episode in the former save dict of the swap representations
+
+    Parameters:
+        maps_after (bool): if the maps are the ones after each step, otherwise before
+        actions (bool): if the dict has the changed flags under "action"
+
+    Returns:
+        dict(string,any[]): the maps, the first and second positions (and changed flags) per step
+    """
+    def legacy_save(self, maps_after=True, actions=True):
+        save = {"maps": [], "pos1": [], "pos2": []}
+        if actions:
+            save["action"] = []
+        if self.initial_map is None:
+            return save
+        maps = list(self.maps())
+        if not maps_after:
+            maps = ([self.initial_map.copy()] + maps)[:len(maps)]
+        save["maps"] = maps
+        save["pos1"] = [[int(s["x1"]), int(s["y1"])] for s in self.steps]
+        save["pos2"] = [[int(s["x2"]), int(s["y2"])] for s in self.steps]
+        if actions:
+            save["action"] = self.steps["changed"].tolist()
+        return save
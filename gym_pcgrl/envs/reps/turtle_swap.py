@@ -3,6 +3,7 @@ from PIL import Image
 from gymnasium import spaces
 import numpy as np
 from collections import OrderedDict
+from gym_pcgrl.envs.reps.swap_recorder import SwapRecorder
 
 """
 The turtle representation where the agent is trying to modify the position of the
@@ -19,10 +20,19 @@ class TurtleSwapRepresentation(Representation):
         self.width = kwargs["width"]
         self.height = kwargs["height"]
         self._warp = kwargs["warp"]
-        self.save = {"maps": [], "pos1": [], "pos2": []}
+        # opt-in trajectory of the swaps, see SwapRecorder
+        self.recorder = SwapRecorder() if kwargs.get("record_swaps", False) else None
+
+    """
+    The recorded swaps with the map before every swap, empty if recording is off
+    """
+    @property
+    def save(self):
+        if self.recorder is None:
+            return {"maps": [], "pos1": [], "pos2": []}
+        return self.recorder.legacy_save(maps_after=False, actions=False)
 
     def reset(self, width, height, prob):
-        self.save = {"maps": [], "pos1": [], "pos2": []}
         self.x1 = self._random.randint(width)
         self.y1 = self._random.randint(height)
         self.x2 = self._random.randint(width)
@@ -39,6 +49,8 @@ class TurtleSwapRepresentation(Representation):
             self._old_map = self._map.copy().astype(np.uint8)
         else:
             self._map = self._old_map.copy().astype(np.uint8)
+        if self.recorder is not None:
+            self.recorder.start(self._map)
 
     def adjust_param(self, **kwargs):
         super().adjust_param(**kwargs)
@@ -101,11 +113,10 @@ class TurtleSwapRepresentation(Representation):
         elif self._map[self.y1][self.x1] == self._map[self.y2][self.x2]:
             change = False
         else:
-            # save
-            self.save["maps"].append(self._map.copy())
-            self.save["pos1"].append([self.x1, self.y1])
-            self.save["pos2"].append([self.x2, self.y2])
-            
+            # only the swaps are recorded
+            if self.recorder is not None:
+                self.recorder.record(self.x1, self.y1, self.x2, self.y2, True)
+
             # swap
             tmp = self._map[self.y1][self.x1]
             self._map[self.y1][self.x1] = self._map[self.y2][self.x2]
@@ -6,16 +6,27 @@ from gymnasium import spaces
 import numpy as np
 from gym_pcgrl.envs.helper import gen_preset_random_map, gen_random_map
 from nmmo import Terrain
+from gym_pcgrl.envs.reps.swap_recorder import SwapRecorder
 
 
 class SwapRepresentation(Representation):
     # aka swap wide
     
-    def __init__(self, init_random_map, num_players=2, **kwargs):
+    def __init__(self, init_random_map, num_players=2, record_swaps=False, **kwargs):
         super().__init__()
         self.init_random_map = init_random_map
         self.num_players = num_players
-        self.save = {"maps": [], "pos1": [], "pos2": [], "action": []}
+        # opt-in trajectory of the episode, see SwapRecorder
+        self.recorder = SwapRecorder() if record_swaps else None
+
+    """
+    The recorded episode with the map before every step, empty if recording is off
+    """
+    @property
+    def save(self):
+        if self.recorder is None:
+            return {"maps": [], "pos1": [], "pos2": [], "action": []}
+        return self.recorder.legacy_save(maps_after=False)
 
     def get_action_space(self, width, height, num_tiles):
         return spaces.MultiDiscrete([width, height, width, height, 1])
@@ -31,7 +42,6 @@ class SwapRepresentation(Representation):
         })
 
     def reset(self, width, height, prob):
-        self.save = {"maps": [], "pos1": [], "pos2": [], "action": []}
         if self._random_start or self._old_map is None:
             if self.init_random_map is False:
                 self._map = gen_preset_random_map(self._random, width, height, self.num_players)
@@ -43,29 +53,30 @@ class SwapRepresentation(Representation):
             self._old_map = self._map.copy().astype(np.uint8)
         else:
             self._map = self._old_map.copy().astype(np.uint8)
+        if self.recorder is not None:
+            self.recorder.start(self._map)
+
+    def record(self, action, change):
+        if self.recorder is not None:
+            self.recorder.record(action[0], action[1], action[2], action[3], change)
 
     def update(self, action):
         pos1x, pos1y = action[0], action[1]
         pos2x, pos2y = action[2], action[3]
-                
-        # saving stats        
-        self.save["maps"].append(self._map.copy())
-        self.save["pos1"].append([pos1x, pos1y])
-        self.save["pos2"].append([pos2x, pos2y])
 
         # dont swap if the same
         if self._map[pos1y][pos1x] == self._map[pos2y][pos2x]:
-            self.save["action"].append(False)       
+            self.record(action, False)
             return False, pos1x, pos1y
             
         if action[-1] == 1:                      
             tmp = self._map[pos1y][pos1x]
             self._map[pos1y][pos1x] = self._map[pos2y][pos2x]
             self._map[pos2y][pos2x] = tmp
-            self.save["action"].append(True)       
+            self.record(action, True)
             return True, pos1x, pos1y
         else:
-            self.save["action"].append(False)       
+            self.record(action, False)
             return False, pos1x, pos1y
         
 class SwapWideLiteRepresentation(SwapRepresentation):
@@ -77,19 +88,14 @@ class SwapWideLiteRepresentation(SwapRepresentation):
     def update(self, action):
         pos1x, pos1y = action[0], action[1]
         pos2x, pos2y = action[2], action[3]
-                
-        # saving stats        
-        self.save["maps"].append(self._map.copy())
-        self.save["pos1"].append([pos1x, pos1y])
-        self.save["pos2"].append([pos2x, pos2y])
 
         # dont swap if the same
         if self._map[pos1y][pos1x] == self._map[pos2y][pos2x]:
-            self.save["action"].append(False)       
+            self.record(action, False)
             return False, pos1x, pos1y
                     
         tmp = self._map[pos1y][pos1x]
         self._map[pos1y][pos1x] = self._map[pos2y][pos2x]
         self._map[pos2y][pos2x] = tmp
-        self.save["action"].append(True)       
+        self.record(action, True)
         return True, pos1x, pos1y
@@ -0,0 +1,210 @@
+import numpy as np
+
+from gym_pcgrl.envs.helper import get_int_prob
+from gym_pcgrl.envs.probs import PROBLEMS
+from gym_pcgrl.envs.probs.problem import Problem
+from gym_pcgrl.envs.reps import REPRESENTATIONS
+
+"""
+Several PcgrlEnvs with swap representations stepped as one. The maps of all envs live in one
+(N, H, W) uint8 array, the swaps of all envs are applied with one fancy index and the changed
+maps go to the problem as one batch (get_stats_many), so per env only the reward and the
+episode bookkeeping are left in python.
+"""
+
+# the representations whose update VectorPcgrlEnv applies to all envs at once
+SWAP_REPRESENTATIONS = ("swap", "swapwidelite")
+
+
+class VectorPcgrlEnv:
+    """
+    The vectorized environment. Follows the conventions of the VecEnvs of stable-baselines3:
+    observation_space and action_space are the spaces of a single env, step returns the stacked
+    observations, rewards and dones with an info dict per env, and envs whose episode is over
+    are reset right away, their last observation is kept in info["terminal_observation"].
+
+    Parameters:
+        num_envs (int): the number of envs
+        prob (string): the problem, see PcgrlEnv
+        rep (string): the representation, one of SWAP_REPRESENTATIONS
+        **kwargs: the arguments of the problem and the representation, one instance of each
+        is shared by all envs, so the problem keeps one simulation pool and cache for all
+
+    The shared problem must not keep episode state its stats and rewards depend on. The state
+    of every episode is kept here instead: its start stats and its common random numbers seed,
+    which is passed to the problem with every map (see NMMODiff.next_crn_seed). Problems that
+    start episodes with new_episode otherwise are refused. The regions of the maps are not
+    tracked, every map is labeled from scratch.
+    """
+    def __init__(self, num_envs, prob="nmmodiff", rep="swap", **kwargs):
+        if rep not in SWAP_REPRESENTATIONS:
+            raise ValueError(f"Unsupported representation {rep}, expected one of {list(SWAP_REPRESENTATIONS)}")
+        self.num_envs = num_envs
+        self._rep_name = rep
+        self._prob = PROBLEMS[prob](**kwargs)
+        if type(self._prob).new_episode is not Problem.new_episode and not hasattr(self._prob, "next_crn_seed"):
+            raise ValueError(f"Problem {prob} keeps episode state, it cannot be shared by several envs")
+        self._rep = REPRESENTATIONS[rep](**kwargs)
+        self._width, self._height = self._prob._width, self._prob._height
+        self._maps = np.zeros((num_envs, self._height, self._width), dtype=np.uint8)
+        self._stats = [None] * num_envs
+        # the stats of the first map of every episode, the problem only holds the last reset one
+        self._start_stats = [None] * num_envs
+        # the common random numbers seed of the episode of every env, None without sim_crn
+        self._seeds = [None] * num_envs
+        self._crn = getattr(self._prob, "sim_config", None) is not None and self._prob.sim_config.crn
+        self._iterations = np.zeros(num_envs, dtype=int)
+        self._changes = np.zeros(num_envs, dtype=int)
+        self._max_changes = 8
+        self._max_iterations = 100
+        self._actions = None
+
+        num_tiles = len(self._prob.get_tile_types())
+        self.action_space = self._rep.get_action_space(self._width, self._height, num_tiles)
+        self.observation_space = self._rep.get_observation_space(self._width, self._height, num_tiles)
+
+    def seed(self, seed=None):
+        seed = self._rep.seed(seed)
+        self._prob.seed(seed)
+        return [seed] * self.num_envs
+
+    """
+    Adjust the parameters of the problem, the representation and the episode limits, see
+    PcgrlEnv.adjust_param
+    """
+    def adjust_param(self, **kwargs):
+        if 'change_percentage' in kwargs:
+            percentage = min(1, max(0, kwargs.get('change_percentage')))
+            self._max_changes = max(int(percentage * self._width * self._height), 1)
+        self._prob.adjust_param(**kwargs)
+        self._rep.adjust_param(**kwargs)
+        if "max_iterations" in kwargs:
+            self._max_iterations = kwargs["max_iterations"]
+        if "max_changes" in kwargs:
+            self._max_changes = kwargs["max_changes"]
+
+    """
+    Reset all envs
+
+    Returns:
+        dict(string,int[][][]): the stacked observations
+    """
+    def reset(self):
+        self._reset_envs(np.arange(self.num_envs))
+        return self.get_observation()
+
+    def _reset_envs(self, envs):
+        prob = get_int_prob(self._prob._prob, self._prob.get_tile_types())
+        for i in envs:
+            self._rep.reset(self._width, self._height, prob)
+            self._maps[i] = self._rep._map
+            # the shared problem holds one seed, so every episode keeps its own and passes it along
+            if self._crn:
+                self._seeds[i] = self._prob.next_crn_seed()
+        self._iterations[envs] = 0
+        self._changes[envs] = 0
+        for i, stats in zip(envs, self.get_stats(envs)):
+            self._stats[i] = stats
+            self._start_stats[i] = stats
+            self._prob.reset(stats)
+
+    """
+    Get the stats of the maps of some envs with one call to the problem, each simulated with
+    the seed of its episode
+    """
+    def get_stats(self, envs):
+        maps = [self._maps[i] for i in envs]
+        seeds = [self._seeds[i] for i in envs]
+        if len(maps) == 0:
+            return []
+        if hasattr(self._prob, "get_stats_many"):
+            return self._prob.get_stats_many(maps, seeds=seeds)
+        return [self._prob.get_stats(map) if seed is None else self._prob.get_stats(map, seed)
+                for map, seed in zip(maps, seeds)]
+
+    def get_observation(self):
+        return {"map": self._maps.copy()}
+
+    """
+    Swap the tiles of all envs at once
+
+    Parameters:
+        actions (int[][]): the action of every env, (x1, y1, x2, y2[, swap])
+        active (bool[]): the envs that take their action
+
+    Returns:
+        bool[]: if the map of an env changed
+    """
+    def update(self, actions, active):
+        envs = np.arange(self.num_envs)
+        x1, y1, x2, y2 = actions[:, 0], actions[:, 1], actions[:, 2], actions[:, 3]
+        first, second = self._maps[envs, y1, x1], self._maps[envs, y2, x2]
+        change = active & (first != second)
+        if self._rep_name == "swap":
+            change &= actions[:, -1] == 1
+        self._maps[envs[change], y1[change], x1[change]] = second[change]
+        self._maps[envs[change], y2[change], x2[change]] = first[change]
+        return change
+
+    """
+    Advance all envs, see PcgrlEnv.step
+
+    Parameters:
+        actions (int[][]): the action of every env
+
+    Returns:
+        dict(string,int[][][]): the stacked observations after the actions (after the reset
+        for envs whose episode is over)
+        float[]: the reward of every env
+        bool[]: if the episode of an env is over
+        dict[]: the debug information of every env
+    """
+    def step(self, actions):
+        actions = np.asarray(actions, dtype=int).reshape(self.num_envs, -1)
+        # envs that start balanced are over at once, as in PcgrlEnv.step
+        balanced = np.array(["balancing" in s and s["balancing"] == self._prob.balancing for s in self._stats])
+        self._iterations[~balanced] += 1
+        old_stats = list(self._stats)
+        change = self.update(actions, ~balanced)
+        self._changes += change
+
+        changed = np.nonzero(change)[0]
+        for i, stats in zip(changed, self.get_stats(changed)):
+            self._stats[i] = stats
+
+        rewards = np.zeros(self.num_envs, dtype=np.float32)
+        dones = balanced.copy()
+        infos = []
+        for i in range(self.num_envs):
+            if not balanced[i]:
+                rewards[i] = self._prob.get_reward(self._stats[i], old_stats[i])
+                dones[i] = self._prob.get_episode_over(self._stats[i], old_stats[i]) or \
+                    self._changes[i] >= self._max_changes or self._iterations[i] >= self._max_iterations
+            info = self._prob.get_debug_info(self._stats[i], old_stats[i])
+            info["iterations"] = int(self._iterations[i])
+            info["changes"] = int(self._changes[i])
+            info["max_iterations"] = self._max_iterations
+            info["max_changes"] = self._max_changes
+            if dones[i]:
+                info["terminal_observation"] = {"map": self._maps[i].copy()}
+            infos.append(info)
+
+        done = np.nonzero(dones)[0]
+        if len(done) > 0:
+            self._reset_envs(done)
+        return self.get_observation(), rewards, dones, infos
+
+    def step_async(self, actions):
+        self._actions = actions
+
+    def step_wait(self):
+        return self.step(self._actions)
+
+    def get_maps(self):
+        return self._maps
+
+    def get_rep_stats(self):
+        return self._stats
+
+    def close(self):
+        self._prob.close()
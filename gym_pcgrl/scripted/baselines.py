@@ -47,6 +47,10 @@ class Scripted(nmmo.Agent):
         self.spawnR    = None
         self.spawnC    = None
 
+        # the global random module unless the config asks for seeded agents
+        self.seed      = None
+        self.rng       = random
+
     @property
     def policy(self):
        return self.__class__.__name__
@@ -59,15 +63,16 @@ class Scripted(nmmo.Agent):
 
     def forage(self):
         '''Min/max food and water using Dijkstra's algorithm'''
-        move.forageDijkstra(self.config, self.ob, self.actions, self.food_max, self.water_max)
+        move.forageDijkstra(self.config, self.ob, self.actions, self.food_max, self.water_max, rng=self.rng,
+                window=self.window)
 
     def gather(self, resource):
         '''BFS search for a particular resource'''
-        return move.gatherBFS(self.config, self.ob, self.actions, resource)
+        return move.gatherBFS(self.config, self.ob, self.actions, resource, rng=self.rng, window=self.window)
 
     def explore(self):
         '''Route away from spawn'''
-        move.explore(self.config, self.ob, self.actions, self.r, self.c)
+        move.explore(self.config, self.ob, self.actions, self.r, self.c, self.rng, self.window)
 
     @property
     def downtime(self):
@@ -76,7 +81,7 @@ class Scripted(nmmo.Agent):
 
     def evade(self):
         '''Target and path away from an attacker'''
-        move.evade(self.config, self.ob, self.actions, self.attacker)
+        move.evade(self.config, self.ob, self.actions, self.attacker, self.rng, self.window)
         self.target     = self.attacker
         self.targetID   = self.attackerID
         self.targetDist = self.attackerDist
@@ -85,7 +90,7 @@ class Scripted(nmmo.Agent):
         '''Attack the current target'''
         if self.target is not None:
            assert self.targetID is not None
-           style = random.choice(self.style)
+           style = self.rng.choice(self.style)
            attack.target(self.config, self.actions, style, self.targetID)
 
     def target_weak(self):
@@ -287,7 +292,7 @@ class Scripted(nmmo.Agent):
 
         purchase = None
         best = list(self.best_heuristic.items())
-        random.shuffle(best)
+        self.rng.shuffle(best)
         for cls, itm in best:
             #Buy top k
             if cls in buy_k:
@@ -323,6 +328,13 @@ class Scripted(nmmo.Agent):
         if self.config.EQUIPMENT_SYSTEM_ENABLED and not self.consume():
             self.equip(items=self.wishlist)
 
+    def seed_rng(self):
+        '''Reseed the agent whenever the config carries a new AGENT_SEED'''
+        seed = getattr(self.config, 'AGENT_SEED', None)
+        if seed != self.seed:
+            self.seed = seed
+            self.rng  = random if seed is None else random.Random(f'{seed}-{self.iden}')
+
     def __call__(self, obs):
         '''Process observations and return actions
 
@@ -330,8 +342,10 @@ class Scripted(nmmo.Agent):
            obs: An observation object from the environment. Unpack with scripting.Observation
         '''
         self.actions = {}
+        self.seed_rng()
 
         self.ob = scripting.Observation(self.config, obs)
+        self.window = move.Window(self.config, self.ob)
         agent   = self.ob.agent
 
         # Time Alive
@@ -399,7 +413,7 @@ class Meander(Scripted):
     def __call__(self, obs):
         super().__call__(obs)
 
-        move.meander(self.config, self.ob, self.actions)
+        move.meander(self.config, self.ob, self.actions, self.rng, self.window)
         return self.actions
 
 class Explore(Scripted):
@@ -449,6 +463,64 @@ class ForageOnlyHandicap(Forage):
             return {}
     
 
+class EntityAttribute:
+    '''Attribute of the agent decoded from the current observation only when read'''
+    def __init__(self, name):
+        self.name = name
+
+    def __get__(self, agent, owner=None):
+        if agent is None:
+            return self
+        return scripting.Observation.attribute(agent.ob.agent, getattr(Serialized.Entity, self.name))
+
+
+class LeanScripted(nmmo.Agent):
+    '''Slim base class for the agents of balancing simulations.
+
+    Unlike Scripted it decodes nothing but the vision window up front; entity
+    attributes are read from the observation on access'''
+    scripted = True
+    color    = colors.Neon.SKY
+
+    timeAlive = EntityAttribute('TimeAlive')
+    r         = EntityAttribute('R')
+    c         = EntityAttribute('C')
+    health    = EntityAttribute('Health')
+    food      = EntityAttribute('Food')
+    water     = EntityAttribute('Water')
+
+    def __init__(self, config, idx):
+        super().__init__(config, idx)
+        self.food_max  = config.RESOURCE_BASE
+        self.water_max = config.RESOURCE_BASE
+
+        self.seed      = None
+        self.rng       = random
+
+    @property
+    def policy(self):
+       return self.__class__.__name__
+
+    seed_rng = Scripted.seed_rng
+
+    def __call__(self, obs):
+        self.actions = {}
+        self.seed_rng()
+
+        self.ob     = scripting.Observation(self.config, obs)
+        self.window = move.Window(self.config, self.ob)
+
+
+class LeanForageOnly(LeanScripted):
+    '''Same decisions as ForageOnly without decoding unused attributes'''
+
+    def __call__(self, obs):
+        super().__call__(obs)
+        move.forageDijkstra(self.config, self.ob, self.actions, self.food_max, self.water_max, rng=self.rng,
+                window=self.window)
+        return self.actions
+
+
 class Combat(Scripted):
     '''Forages, fights, and explores'''
     def __init__(self, config, idx):
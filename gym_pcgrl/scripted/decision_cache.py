@@ -0,0 +1,63 @@
+from collections import OrderedDict
+
+import numpy as np
+
+import nmmo
+
+
+class DecisionCache:
+    '''Bounded LRU cache of agent decisions keyed by the visible window.
+
+    The forage decision only depends on the materials and occupancy of the visible
+    tiles and on the agent's resources, so on small maps the same windows recur
+    constantly, across simulation runs and across maps.'''
+    def __init__(self, max_size=32768):
+        self.max_size = max_size
+        self.hits     = 0
+        self.misses   = 0
+        self._entries = OrderedDict()
+
+    @staticmethod
+    def window(ob):
+        '''Compact encoding of the material and occupancy of every visible tile.
+        Accepts an observation or an already decoded move.Window'''
+        if hasattr(ob, 'encoding'):
+            return ob.encoding()
+        Tile = nmmo.Serialized.Tile
+        return np.ascontiguousarray(ob.tiles[:, [Tile.Index.index, Tile.NEnts.index]].T, dtype=np.uint8).tobytes()
+
+    def key(self, ob, *args):
+        return (self.window(ob),) + tuple(args)
+
+    def get(self, key):
+        value = self._entries.get(key)
+        if value is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key, value):
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        self._entries.clear()
+        self.hits   = 0
+        self.misses = 0
+
+    @property
+    def hit_rate(self):
+        total = self.hits + self.misses
+        return self.hits / total if total > 0 else 0.0
+
+    def stats(self, prefix='decision_cache'):
+        return {prefix + '_hits': self.hits, prefix + '_misses': self.misses,
+                prefix + '_hit_rate': self.hit_rate}
+
+
+# shared by all agents of a process, i.e. all simulation runs and maps of a worker
+FORAGE_CACHE = DecisionCache()
@@ -2,12 +2,15 @@ from pdb import set_trace as T
 import numpy as np
 import random
 
-from queue import PriorityQueue, Queue
+from collections import deque
+from functools import lru_cache
+from heapq import heappop, heappush
 
 import nmmo
 from nmmo.lib import material
 
 from gym_pcgrl.scripted import utils
+from gym_pcgrl.scripted.decision_cache import FORAGE_CACHE
 
 def adjacentPos(pos):
    r, c = pos
@@ -20,6 +23,18 @@ def inSight(dr, dc, vision):
           dr <= vision and
           dc <= vision)
 
+@lru_cache(maxsize=None)
+def windowTables(vision):
+   '''Offsets and in-sight neighbours of every flat window index, where
+   index = (vision + dr)*diameter + vision + dc. Neighbours follow the
+   order of adjacentPos, which decides ties in the searches below'''
+   diameter  = 2*vision + 1
+   offsets   = tuple((idx//diameter - vision, idx%diameter - vision) for idx in range(diameter*diameter))
+   neighbors = tuple(
+         tuple((vision + r)*diameter + vision + c for r, c in adjacentPos(pos) if inSight(r, c, vision))
+         for pos in offsets)
+   return offsets, neighbors
+
 def vacant(tile):
    Tile     = nmmo.Serialized.Tile
    occupied = nmmo.scripting.Observation.attribute(tile, Tile.NEnts)
@@ -27,11 +42,49 @@ def vacant(tile):
 
    return matl in material.Habitable and not occupied
 
-def rand(config, ob, actions):
-   direction                 = random.choice(nmmo.action.Direction.edges)
+class Window:
+   '''The visible tiles of an agent decoded once per tick into arrays indexed by
+   (vision + dr, vision + dc), the same layout as Observation.tile(dr, dc)'''
+   def __init__(self, config, ob):
+      Tile          = nmmo.Serialized.Tile
+      self.vision   = config.PLAYER_VISION_RADIUS
+      diameter      = 2*self.vision + 1
+
+      self.matl     = ob.tiles[:, Tile.Index.index].astype(np.int64).reshape(diameter, diameter)
+      self.nents    = ob.tiles[:, Tile.NEnts.index].astype(np.int64).reshape(diameter, diameter)
+      self.habitable  = np.isin(self.matl, [m.index for m in material.Habitable])
+      self.impassible = np.isin(self.matl, [m.index for m in material.Impassible])
+      self.vacant   = self.habitable & (self.nents == 0)
+      self.forest   = self.matl == material.Forest.index
+
+      # tiles with water on an adjacent visible tile
+      water = np.pad(self.matl == material.Water.index, 1)
+      self.water_adjacent = water[:-2, 1:-1] | water[2:, 1:-1] | water[1:-1, :-2] | water[1:-1, 2:]
+
+      # row-major lists for the pathfinding kernels, see windowTables
+      self.diameter    = diameter
+      self.origin      = self.vision*diameter + self.vision
+      self.flat_matl   = self.matl.ravel().tolist()
+      self.flat_vacant = self.vacant.ravel().tolist()
+      self.flat_forest = self.forest.ravel().tolist()
+      self.flat_water_adjacent = self.water_adjacent.ravel().tolist()
+      self.flat_blocked = (self.impassible | (self.nents > 0)).ravel().tolist()
+
+   def index(self, dr, dc):
+      return self.vision + dr, self.vision + dc
+
+   def flat(self, dr, dc):
+      return (self.vision + dr)*self.diameter + self.vision + dc
+
+   def encoding(self):
+      '''Compact bytes of the material and occupancy of every visible tile'''
+      return np.stack([self.matl, self.nents]).astype(np.uint8).tobytes()
+
+def rand(config, ob, actions, rng=random):
+   direction                 = rng.choice(nmmo.action.Direction.edges)
    actions[nmmo.action.Move] = {nmmo.action.Direction: direction}
 
-def towards(direction):
+def towards(direction, rng=random):
    if direction == (-1, 0):
       return nmmo.action.North
    elif direction == (1, 0):
@@ -41,35 +94,26 @@ def towards(direction):
    elif direction == (0, 1):
       return nmmo.action.East
    else:
-      return random.choice(nmmo.action.Direction.edges)
+      return rng.choice(nmmo.action.Direction.edges)
 
-def pathfind(config, ob, actions, rr, cc):
-   direction = aStar(config, ob, actions, rr, cc)
-   direction = towards(direction)
+def pathfind(config, ob, actions, rr, cc, rng=random, window=None):
+   direction = aStar(config, ob, actions, rr, cc, window=window)
+   direction = towards(direction, rng)
    actions[nmmo.action.Move] = {nmmo.action.Direction: direction}
 
-def meander(config, ob, actions):
-   agent  = ob.agent
-   Entity = nmmo.Serialized.Entity
-   Tile   = nmmo.Serialized.Tile
+def meander(config, ob, actions, rng=random, window=None):
+   if window is None:
+      window = Window(config, ob)
 
-   cands = []
-   if vacant(ob.tile(-1, 0)):
-      cands.append((-1, 0))
-   if vacant(ob.tile(1, 0)):
-      cands.append((1, 0))
-   if vacant(ob.tile(0, -1)):
-      cands.append((0, -1))
-   if vacant(ob.tile(0, 1)):
-      cands.append((0, 1))
+   cands = [d for d in [(-1, 0), (1, 0), (0, -1), (0, 1)] if window.vacant[window.index(*d)]]
    if not cands:
       return (-1, 0)
 
-   direction = random.choices(cands)[0]
-   direction = towards(direction)
+   direction = rng.choices(cands)[0]
+   direction = towards(direction, rng)
    actions[nmmo.action.Move] = {nmmo.action.Direction: direction}
 
-def explore(config, ob, actions, r, c):
+def explore(config, ob, actions, r, c, rng=random, window=None):
    vision = config.PLAYER_VISION_RADIUS
    sz     = config.MAP_SIZE
    Entity = nmmo.Serialized.Entity
@@ -82,9 +126,9 @@ def explore(config, ob, actions, r, c):
    mmag = max(1, abs(vR), abs(vC))
    rr   = int(np.round(vision*vR/mmag))
    cc   = int(np.round(vision*vC/mmag))
-   pathfind(config, ob, actions, rr, cc)
+   pathfind(config, ob, actions, rr, cc, rng, window)
 
-def evade(config, ob, actions, attacker):
+def evade(config, ob, actions, attacker, rng=random, window=None):
    Entity = nmmo.Serialized.Entity
 
    sr     = nmmo.scripting.Observation.attribute(ob.agent, Entity.R)
@@ -95,79 +139,101 @@ def evade(config, ob, actions, attacker):
 
    rr, cc = (2*sr - gr, 2*sc - gc)
 
-   pathfind(config, ob, actions, rr, cc)
+   pathfind(config, ob, actions, rr, cc, rng, window)
 
-def forageDijkstra(config, ob, actions, food_max, water_max, cutoff=100):
+def forageDijkstra(config, ob, actions, food_max, water_max, cutoff=100, rng=random, cache=FORAGE_CACHE,
+                   window=None):
    vision = config.PLAYER_VISION_RADIUS
    Entity = nmmo.Serialized.Entity
-   Tile   = nmmo.Serialized.Tile
+   if window is None:
+      window = Window(config, ob)
 
    agent  = ob.agent
    food   = nmmo.scripting.Observation.attribute(agent, Entity.Food)
    water  = nmmo.scripting.Observation.attribute(agent, Entity.Water)
 
-   best      = -1000 
-   start     = (0, 0)
-   goal      = (0, 0)
-
-   reward    = {start: (food, water)}
-   backtrace = {start: None}
-
-   queue = Queue()
-   queue.put(start)
+   # the first step only depends on the window and the resources, reuse earlier searches
+   if cache is not None:
+      key  = cache.key(window, food, water, food_max, water_max, cutoff, vision)
+      goal = cache.get(key)
+      if goal is not None:
+         actions[nmmo.action.Move] = {nmmo.action.Direction: towards(goal, rng)}
+         return
+
+   target, goal = forageField(window, food, water, food_max, water_max, cutoff)
+   if cache is not None:
+      cache.put(key, goal)
+   direction = towards(goal, rng)
+   actions[nmmo.action.Move] = {nmmo.action.Direction: direction}
 
-   while not queue.empty():
+def forageField(window, food, water, food_max, water_max, cutoff=100):
+   '''Breadth-first forage search over the flat window
+
+   Every discovered tile inherits the first step of its parent, so the
+   target and the move towards it come out of a single pass without
+   walking a backtrace. The best target maximizes min(food, water) on
+   arrival, then max(food, water).
+
+   Parameters:
+   window (Window): decoded vision window of the agent
+   food, water (int): current resources of the agent
+   food_max, water_max (int): resource capacities
+   cutoff (int): node budget of the search, None to cover the whole window
+
+   Returns:
+   (int, int): offset of the target, (0, 0) if no tile beats standing still
+   (int, int): offset of the first step towards the target
+   '''
+   offsets, neighbors = windowTables(window.vision)
+   size   = len(offsets)
+   start  = window.origin
+   vacant = window.flat_vacant
+   forest = window.flat_forest
+   water_adjacent = window.flat_water_adjacent
+
+   if cutoff is None:
+      cutoff = size + 1
+
+   foods  = [0]*size
+   waters = [0]*size
+   first  = [-1]*size
+   foods[start], waters[start] = food, water
+   first[start] = start
+
+   best  = -1000
+   goal  = start
+   queue = deque([start])
+
+   while queue:
       cutoff -= 1
       if cutoff <= 0:
          break
 
-      cur = queue.get()
-      for nxt in adjacentPos(cur):
-         if nxt in backtrace:
-            continue
-
-         if not inSight(*nxt, vision):
+      cur = queue.popleft()
+      for nxt in neighbors[cur]:
+         if first[nxt] != -1 or not vacant[nxt]:
             continue
 
-         tile     = ob.tile(*nxt)
-         matl     = nmmo.scripting.Observation.attribute(tile, Tile.Index)
-         occupied = nmmo.scripting.Observation.attribute(tile, Tile.NEnts)
-
-         if not vacant(tile):
-            continue
+         food  = max(0, foods[cur] - 1)
+         water = max(0, waters[cur] - 1)
 
-         food, water = reward[cur]
-         food  = max(0, food - 1)
-         water = max(0, water - 1)
-
-         if matl == material.Forest.index:
+         if forest[nxt]:
             food = min(food+food_max//2, food_max)
-         for pos in adjacentPos(nxt):
-            if not inSight(*pos, vision):
-               continue
-
-            tile = ob.tile(*pos)
-            matl = nmmo.scripting.Observation.attribute(tile, Tile.Index)
- 
-            if matl == material.Water.index:
-               water = min(water+water_max//2, water_max)
-               break
+         if water_adjacent[nxt]:
+            water = min(water+water_max//2, water_max)
 
-         reward[nxt] = (food, water)
+         foods[nxt], waters[nxt] = food, water
 
          total = min(food, water)
          if total > best or (
-                 total == best and max(food, water) > max(reward[goal])):
+                 total == best and max(food, water) > max(foods[goal], waters[goal])):
             best = total
             goal = nxt
 
-         queue.put(nxt)
-         backtrace[nxt] = cur
+         first[nxt] = nxt if cur == start else first[cur]
+         queue.append(nxt)
 
-   while goal in backtrace and backtrace[goal] != start:
-      goal = backtrace[goal]
-   direction = towards(goal)
-   actions[nmmo.action.Move] = {nmmo.action.Direction: direction}
+   return offsets[goal], offsets[first[goal]]
 
 def findResource(config, ob, resource):
     vision = config.PLAYER_VISION_RADIUS
@@ -185,7 +251,7 @@ def findResource(config, ob, resource):
 
     return False
 
-def gatherAStar(config, ob, actions, resource, cutoff=100):
+def gatherAStar(config, ob, actions, resource, cutoff=100, rng=random):
     resource_pos = findResource(config, ob, resource)
     if not resource_pos:
         return
@@ -195,142 +261,121 @@ def gatherAStar(config, ob, actions, resource, cutoff=100):
     if not next_pos or next_pos == (0, 0):
         return
 
-    direction = towards(next_pos)
+    direction = towards(next_pos, rng)
     actions[nmmo.action.Move] = {nmmo.action.Direction: direction}
     return True
 
-def gatherBFS(config, ob, actions, resource, cutoff=100):
+def gatherBFS(config, ob, actions, resource, cutoff=100, rng=random, window=None):
     vision = config.PLAYER_VISION_RADIUS
-    Entity = nmmo.Serialized.Entity
-    Tile   = nmmo.Serialized.Tile
+    if window is None:
+        window = Window(config, ob)
+    resources = [e.index for e in resource]
 
-    agent  = ob.agent
-    start  = (0, 0)
+    offsets, neighbors = windowTables(vision)
+    start  = window.origin
+    fish   = material.Fish in resource
+    matl   = window.flat_matl
+    vacant = window.flat_vacant
 
-    backtrace = {start: None}
+    parent = [-1]*len(offsets)
+    parent[start] = start
 
-    queue = Queue()
-    queue.put(start)
+    queue = deque([start])
 
-    found = False
-    while not queue.empty():
+    found = -1
+    while queue:
         cutoff -= 1
         if cutoff <= 0:
             return False
 
-        cur = queue.get()
-        for nxt in adjacentPos(cur):
-            if found:
-                break
-
-            if nxt in backtrace:
+        cur = queue.popleft()
+        for nxt in neighbors[cur]:
+            if parent[nxt] != -1:
                 continue
-        
-            if not inSight(*nxt, vision):
-                continue
-                                                       
-            tile     = ob.tile(*nxt)
-            matl     = nmmo.scripting.Observation.attribute(tile, Tile.Index)
-            occupied = nmmo.scripting.Observation.attribute(tile, Tile.NEnts)
 
-            if material.Fish in resource and material.Fish.index == matl:
+            if fish and matl[nxt] == material.Fish.index:
                 found = nxt
-                backtrace[nxt] = cur
+                parent[nxt] = cur
                 break
 
-            if not vacant(tile):
+            if not vacant[nxt]:
                 continue
 
-            if matl in (e.index for e in resource):
+            if matl[nxt] in resources:
                 found = nxt
-                backtrace[nxt] = cur
+                parent[nxt] = cur
                 break
 
-            for pos in adjacentPos(nxt):
-                if not inSight(*pos, vision):
-                    continue
-
-                tile = ob.tile(*pos)
-                matl = nmmo.scripting.Observation.attribute(tile, Tile.Index)
+            queue.append(nxt)
+            parent[nxt] = cur
 
-                if matl == material.Fish.index:
-                    backtrace[nxt] = cur
-                    break
-
-            queue.put(nxt)
-            backtrace[nxt] = cur
+        if found != -1:
+            break
 
     #Ran out of tiles
-    if not found:
+    if found == -1:
         return False
 
-    found_orig = found
-    while found in backtrace and backtrace[found] != start:
-        found = backtrace[found]
+    #The search used to drain its queue after a hit and gave up if the cutoff ran out first
+    if cutoff <= len(queue):
+        return False
+
+    while parent[found] != start:
+        found = parent[found]
 
-    direction = towards(found)
+    direction = towards(offsets[found], rng)
     actions[nmmo.action.Move] = {nmmo.action.Direction: direction}
 
     return True
 
 
-def aStar(config, ob, actions, rr, cc, cutoff=100):
-   Entity = nmmo.Serialized.Entity
-   Tile   = nmmo.Serialized.Tile
+def aStar(config, ob, actions, rr, cc, cutoff=100, window=None):
    vision = config.PLAYER_VISION_RADIUS
+   if window is None:
+      window = Window(config, ob)
 
-   start = (0, 0)
-   goal  = (rr, cc)
-
-   if start == goal:
+   if (rr, cc) == (0, 0):
       return (0, 0)
 
-   pq = PriorityQueue()
-   pq.put((0, start))
+   offsets, neighbors = windowTables(vision)
+   size    = len(offsets)
+   start   = window.origin
+   goal    = window.flat(rr, cc) if inSight(rr, cc, vision) else -1
+   blocked = window.flat_blocked
+
+   # heap entries order like (priority, (r, c)) since flat indices are row-major
+   pq = [(0, start)]
 
-   backtrace = {}
-   cost = {start: 0}
+   backtrace = [-1]*size
+   cost      = [-1]*size
+   cost[start] = 0
 
    closestPos = start
-   closestHeuristic = utils.l1(start, goal)
+   closestHeuristic = utils.l1((0, 0), (rr, cc))
    closestCost = closestHeuristic
 
-   while not pq.empty():
+   while pq:
       # Use approximate solution if budget exhausted
       cutoff -= 1
       if cutoff <= 0:
-         if goal not in backtrace:
-            goal = closestPos
          break
 
-      priority, cur = pq.get()
+      priority, cur = heappop(pq)
 
       if cur == goal:
          break
 
-      for nxt in adjacentPos(cur):
-         if not inSight(*nxt, vision):
-            continue
-
-         tile     = ob.tile(*nxt)
-         matl     = nmmo.scripting.Observation.attribute(tile, Tile.Index)
-         occupied = nmmo.scripting.Observation.attribute(tile, Tile.NEnts)
-
-         #if not vacant(tile):
-         #   continue
-
-         if occupied:
-            continue
-
+      newCost = cost[cur] + 1
+      for nxt in neighbors[cur]:
          #Omitted water from the original implementation. Seems key
-         if matl in material.Impassible:
+         if blocked[nxt]:
             continue
 
-         newCost = cost[cur] + 1
-         if nxt not in cost or newCost < cost[nxt]:
+         if cost[nxt] == -1 or newCost < cost[nxt]:
             cost[nxt] = newCost
-            heuristic = utils.lInfty(goal, nxt)
-            priority = newCost + heuristic
+            r, c      = offsets[nxt]
+            heuristic = max(abs(rr - r), abs(cc - c))
+            priority  = newCost + heuristic
 
             # Compute approximate solution
             if heuristic < closestHeuristic or (
@@ -339,16 +384,12 @@ def aStar(config, ob, actions, rr, cc, cutoff=100):
                closestHeuristic = heuristic
                closestCost = priority
 
-            pq.put((priority, nxt))
+            heappush(pq, (priority, nxt))
             backtrace[nxt] = cur
 
-   #Not needed with scuffed material list above
-   #if goal not in backtrace:
-   #   goal = closestPos
-
    goal = closestPos
-   while goal in backtrace and backtrace[goal] != start:
+   while backtrace[goal] != -1 and backtrace[goal] != start:
       goal = backtrace[goal]
 
-   return goal
+   return offsets[goal]
 
@@ -0,0 +1,7 @@
+from gym_pcgrl.simulation.pool import SimulationPool
+from gym_pcgrl.simulation.shm import SharedMemoryPool
+from gym_pcgrl.simulation.forage import ForageSimulator
+from gym_pcgrl.simulation.cache import SimulationCache
+from gym_pcgrl.simulation.config import SimulationConfig
+from gym_pcgrl.simulation.service import SimulationService
+from gym_pcgrl.simulation.seeding import run_seeds
@@ -0,0 +1,102 @@
+from collections import Counter
+
+import numpy as np
+
+from gym_pcgrl.envs.helper import run_dikjstra
+from gym_pcgrl.simulation.symmetry import PLAYER_OFFSET, dihedral_transforms
+
+GRASS, FOREST, STONE, WATER = 0, 1, 2, 3
+
+"""
+A static analyzer of rl maps that detects maps whose simulation outcome is known without
+simulating them. Rules:
+    all_starve: no player can reach a forest or a tile next to water, all players die in the
+    same tick, which the simulation reports as a draw of all players
+    sole_survivor: the other players can neither reach a forest nor water and die in tick 25,
+    while exactly one player spawns next to water, so it drinks in the first tick and can not
+    die before tick 26. Reachable water alone is not enough, the agents do not always drink in time
+    symmetric (optional): two players on a map that is mirrored or rotated onto itself with the
+    players swapped, the runs are split evenly between them. The agents break ties in a fixed
+    order, so this one is an approximation.
+
+Parameters:
+    num_players (int): the number of players
+    symmetric (bool): enable the symmetric rule
+"""
+
+
+class StaticAnalyzer:
+    def __init__(self, num_players=2, symmetric=False):
+        self.num_players = num_players
+        self.symmetric = symmetric
+        self.counts = Counter()
+        self.passable = [GRASS, FOREST] + [PLAYER_OFFSET + i for i in range(num_players)]
+
+    """
+    Analyze a map
+
+    Parameters:
+        map (int[][]): the rl map
+        runs (int): the number of simulation runs to synthesize
+
+    Returns:
+        int[][]: a winner list for every run, None if the outcome is not known
+    """
+    def analyze(self, map, runs):
+        a = np.asarray(map)
+        regions = [self.region(a, i) for i in range(self.num_players)]
+        if any(r is None for r in regions):
+            return None
+
+        w = np.pad(a == WATER, 1)
+        water = (a != WATER) & (w[:-2, 1:-1] | w[2:, 1:-1] | w[1:-1, :-2] | w[1:-1, 2:])
+        forest = [bool(np.any(r & (a == FOREST))) for r in regions]
+        drink = [bool(np.any(r & water)) for r in regions]
+
+        if not any(forest) and not any(drink):
+            return self.fire("all_starve", [list(range(1, self.num_players + 1)) for _ in range(runs)])
+
+        spawn_drink = [bool(water[self.position(a, i)]) for i in range(self.num_players)]
+        if spawn_drink.count(True) == 1:
+            i = spawn_drink.index(True)
+            if not any(forest[j] or drink[j] for j in range(self.num_players) if j != i):
+                return self.fire("sole_survivor", [[i + 1] for _ in range(runs)])
+
+        if self.symmetric and self.num_players == 2 and self.is_symmetric(a):
+            winners = [[1 + r % 2] for r in range(runs)]
+            if runs % 2 == 1:
+                winners[-1] = [1, 2]
+            return self.fire("symmetric", winners)
+        return None
+
+    def fire(self, rule, winners):
+        self.counts[rule] += 1
+        return winners
+
+    def position(self, a, i):
+        y, x = np.where(a == PLAYER_OFFSET + i)
+        if len(y) == 0:
+            return None
+        return y[0], x[0]
+
+    """
+    The tiles a player can reach over grass, forest and the other players' spawn tiles
+
+    Returns:
+        bool[][]: the reachable tiles, None if the player is not on the map
+    """
+    def region(self, a, i):
+        pos = self.position(a, i)
+        if pos is None:
+            return None
+        dikjstra_map, _ = run_dikjstra(pos[1], pos[0], a, self.passable)
+        return dikjstra_map >= 0
+
+    def is_symmetric(self, a):
+        swapped = a.copy()
+        swapped[a == PLAYER_OFFSET] = PLAYER_OFFSET + 1
+        swapped[a == PLAYER_OFFSET + 1] = PLAYER_OFFSET
+        return any(np.array_equal(t, swapped) for t in dihedral_transforms(a)[1:])
+
+    def stats(self):
+        return {"precheck_" + rule: count for rule, count in self.counts.items()}
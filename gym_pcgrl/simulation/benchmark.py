@@ -0,0 +1,125 @@
+"""
+Helpers to measure the per-tick cost of the simulation agents and profiles of NMMODiff. The
+win rates of the simulation backends are compared in tests/test_forage_backend.py.
+"""
+import time
+from collections import Counter
+
+
+"""
+Compute the win rate of every player from a list of winner lists
+
+Parameters:
+    results (int[][]): a winner list for every simulation run
+    num_players (int): the number of players
+
+Returns:
+    float[]: the share of wins of every player
+"""
+def win_rates(results, num_players):
+    counts = Counter(w for winners in results for w in winners)
+    total = sum(counts[i + 1] for i in range(num_players))
+    if total == 0:
+        return [0.0] * num_players
+    return [counts[i + 1] / total for i in range(num_players)]
+
+
+"""
+Measure the per-tick cost of the simulation agents on the observations of a real game
+
+The observations of one nmmo game on the map are recorded first and then replayed
+through a fresh instance of every agent class, with the forage decision cache cleared
+in between so all classes see the same cache hits.
+
+Parameters:
+    map (int[][]): the rl map to play, defaults to the bundled 2 player map
+    agents (str[]): names of agent classes in gym_pcgrl.scripted.baselines, the first one is the reference
+    ticks (int): the maximum number of recorded ticks
+    repeats (int): how often the recorded ticks are replayed
+
+Returns:
+    dict[]: the time per agent call, the speedup over the reference and whether the agent
+    chose the same moves as the reference, for every agent class
+"""
+def agent_overhead(map=None, agents=("ForageOnly", "LeanForageOnly"), ticks=200, repeats=5):
+    from gym_pcgrl.envs.probs.nmmo_diff_prob import DEFAULT_MAPS, NMMOSimulator, rl_to_nmmo
+    from gym_pcgrl.scripted import baselines
+    from gym_pcgrl.scripted.decision_cache import FORAGE_CACHE
+
+    if map is None:
+        map = DEFAULT_MAPS[2]
+    num_players = len([v for v in set(map.flatten()) if v >= 4])
+
+    simulator = NMMOSimulator(num_players)
+    rl_to_nmmo(map, simulator.conf, num_players)
+    simulator.env.realm.update_map(simulator.conf)
+    simulator.env.config.AGENT_SEED = 0
+    recorded = [simulator.env.reset()]
+    while len(recorded) < ticks and simulator.env.num_agents > 1:
+        obs, _, _, _ = simulator.env.step({})
+        recorded.append(obs)
+
+    report = []
+    reference = None
+    for name in agents:
+        cls = getattr(baselines, name)
+        players = {}
+        moves = []
+        calls = 0
+        FORAGE_CACHE.clear()
+        start = time.perf_counter()
+        for _ in range(repeats):
+            for obs in recorded:
+                for idx, ob in obs.items():
+                    if idx not in players:
+                        players[idx] = cls(simulator.conf, idx)
+                    moves.append(players[idx](ob))
+                    calls += 1
+        elapsed = (time.perf_counter() - start) / max(1, calls)
+        if reference is None:
+            reference = (elapsed, moves)
+        report.append({"agent": name, "time_per_tick": elapsed, "speedup": reference[0] / elapsed,
+                       "same_moves": moves == reference[1]})
+    return report
+
+
+"""
+Measure the cost of the simulation profiles on the same maps and seeds
+
+Parameters:
+    maps (int[][][]): the rl maps to simulate, defaults to the bundled DEFAULT_MAPS
+    runs (int): the number of simulation runs per map and profile
+    profiles (str[]): the names of the profiles in SIM_PROFILES, the first one is the reference
+
+Returns:
+    dict[]: the time per game and per tick, the speedup over the reference and the win rates
+    for every map and profile
+"""
+def profile_overhead(maps=None, runs=20, profiles=("all", "forage_only", "forage_combat")):
+    from gym_pcgrl.envs.probs.nmmo_diff_prob import DEFAULT_MAPS, NMMOSimulator, SIM_AGENT
+    from gym_pcgrl.simulation.seeding import run_seeds
+
+    if maps is None:
+        maps = list(DEFAULT_MAPS.values())
+
+    report = []
+    for map in maps:
+        num_players = len([v for v in set(map.flatten()) if v >= 4])
+        seeds = run_seeds(0, map, runs)
+        reference = None
+        for profile in profiles:
+            simulator = NMMOSimulator(num_players, SIM_AGENT, profile)
+            results = []
+            ticks = 0
+            start = time.perf_counter()
+            for seed in seeds:
+                results.extend(simulator.simulate(map, 1, [seed]))
+                ticks += simulator.env.realm.tick
+            elapsed = time.perf_counter() - start
+            if reference is None:
+                reference = elapsed
+            report.append({"players": num_players, "profile": profile, "time_per_game": elapsed / runs,
+                           "time_per_tick": elapsed / max(1, ticks), "speedup": reference / elapsed,
+                           "win_rates": win_rates(results, num_players)})
+    return report
+
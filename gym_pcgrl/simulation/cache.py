@@ -0,0 +1,101 @@
+import hashlib
+import os
+import pickle
+import tempfile
+from collections import OrderedDict
+
+import numpy as np
+
+"""
+A content addressed cache of simulation results. Entries are keyed by a hash of the map array
+together with the settings that influence the simulation, kept in memory with LRU eviction and
+optionally persisted in a directory that several processes can share.
+
+Parameters:
+    max_size (int): the number of entries kept in memory
+    path (str): an optional directory for the persistent tier
+"""
+
+
+class SimulationCache:
+    def __init__(self, max_size=1024, path=None):
+        self.max_size = max_size
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        if self.path is not None:
+            os.makedirs(self.path, exist_ok=True)
+
+    """
+    Compute the cache key of a map
+
+    Parameters:
+        map (int[][]): the rl map
+        settings: a repr-able description of everything else the result depends on
+
+    Returns:
+        str: the hex digest used as key
+    """
+    @staticmethod
+    def key(map, settings=None):
+        a = np.ascontiguousarray(map, dtype=np.uint8)
+        h = hashlib.blake2b(digest_size=16)
+        h.update(repr(a.shape).encode())
+        h.update(a.tobytes())
+        h.update(repr(settings).encode())
+        return h.hexdigest()
+
+    """
+    Look up a key in memory and then on disk
+
+    Returns:
+        the cached value, None on a miss
+    """
+    def get(self, key):
+        if key in self._entries:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return self._entries[key]
+
+        value = self._load(key)
+        if value is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._remember(key, value)
+        return value
+
+    def put(self, key, value):
+        self._remember(key, value)
+        self._store(key, value)
+
+    def _remember(self, key, value):
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def _load(self, key):
+        if self.path is None:
+            return None
+        try:
+            with open(os.path.join(self.path, key + ".pkl"), "rb") as f:
+                return pickle.load(f)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            return None
+
+    def _store(self, key, value):
+        if self.path is None:
+            return
+        # write to a temporary file first, so other processes never read a partial entry
+        fd, tmp = tempfile.mkstemp(dir=self.path, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            pickle.dump(value, f)
+        os.replace(tmp, os.path.join(self.path, key + ".pkl"))
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self):
+        return {"cache_hits": self.hits, "cache_misses": self.misses}
@@ -0,0 +1,102 @@
+from dataclasses import dataclass, field, fields, replace
+
+"""
+The settings of the balancing simulations in one object. NMMODiff still takes them as sim_*
+kwargs (sim_runs, sim_backend, ...), they end up here without the prefix. Every setting is part
+of the cache key unless it is declared with runtime(), i.e. it only decides how or where the
+runs are computed, never their winners, so a new setting is keyed by default.
+"""
+
+PREFIX = "sim_"
+TRANSPORTS = ("pickle", "shm")
+
+
+"""
+Declare a setting that does not change the simulated winners, left out of the cache key
+"""
+def runtime(default):
+    return field(default=default, metadata={"key": False})
+
+
+@dataclass(frozen=True)
+class SimulationConfig:
+    """
+    Parameters:
+        runs (int): the number of simulation runs per map
+        backend (str): the simulator, "nmmo" or "numpy"
+        profile (str): the game systems of the nmmo simulations, see profiles.SIM_PROFILES
+        fork (bool): play every nmmo run in a child forked from the env reset on the map
+        symmetry (bool): simulate the canonical map of mirrored, rotated and relabeled maps
+        early_stop (bool): simulate in batches and stop once the balancing is decided
+        batch (int): the number of runs per batch with early_stop
+        confidence (float): with early_stop also stop once the target is outside this bound
+        crn (bool): common random numbers, all maps of an episode share their run seeds
+        precheck (bool): skip the simulation of maps with a statically known outcome
+        precheck_symmetric (bool): also decide symmetric maps statically
+        seed (int): the default global seed, None for random games; the seed of every
+        simulation is keyed itself
+        processes (int): the number of warm simulation workers, 0 simulates in this process
+        transport (str): how the pool exchanges maps and winners, "pickle" or "shm"
+        scheduler: "process" or the address of a shared scheduler, see scheduler.serve_scheduler
+        fork_children (int): the maximum number of forked children at once, 0 for one per cpu
+        cache (int): the number of cached maps, 0 disables the in-memory cache
+        cache_path (str): a directory for the persistent tier of the cache
+        speculative (bool): simulate the next swap candidate in the background
+    """
+    runs: int = 10
+    backend: str = "nmmo"
+    profile: str = "all"
+    fork: bool = False
+    symmetry: bool = False
+    early_stop: bool = False
+    batch: int = 2
+    confidence: float = None
+    crn: bool = False
+    precheck: bool = False
+    precheck_symmetric: bool = False
+    seed: int = runtime(None)
+    processes: int = runtime(0)
+    transport: str = runtime("pickle")
+    scheduler: object = runtime(None)
+    fork_children: int = runtime(0)
+    cache: int = runtime(0)
+    cache_path: str = runtime(None)
+    speculative: bool = runtime(False)
+
+    def __post_init__(self):
+        if self.transport not in TRANSPORTS:
+            raise ValueError(f"Unknown simulation transport {self.transport}, expected one of {list(TRANSPORTS)}")
+
+    """
+    Build a config from sim_* kwargs, other kwargs are ignored
+
+    Parameters:
+        kwargs (dict): the kwargs of a problem, e.g. {"sim_runs": 20, "width": 6}
+        config (SimulationConfig): the config the kwargs override, defaults to the default config
+
+    Returns:
+        SimulationConfig: the config
+    """
+    @classmethod
+    def from_kwargs(cls, kwargs, config=None):
+        names = {f.name for f in fields(cls)}
+        settings = {}
+        for name, value in kwargs.items():
+            if not name.startswith(PREFIX):
+                continue
+            if name[len(PREFIX):] not in names:
+                raise TypeError(f"Unknown simulation setting {name}")
+            settings[name[len(PREFIX):]] = value
+        return replace(config or cls(), **settings)
+
+    """
+    The settings the simulated winners depend on, see runtime
+
+    Returns:
+        tuple: (name, value) of every keyed setting
+    """
+    def cache_key(self):
+        return tuple((f.name, getattr(self, f.name)) for f in fields(self) if f.metadata.get("key", True))
+
+    def replace(self, **changes):
+        return replace(self, **changes)
@@ -0,0 +1,70 @@
+import itertools
+import math
+
+"""
+Helpers to stop the simulation runs of a map early, once more runs can not change the
+balancing value (exact) or the target is outside a confidence bound of it (approximate).
+"""
+
+
+"""
+The winner lists a single simulation run can append (as counts per player): any non empty set
+of players that ate enough food in the same tick, a survivor of starvation that also ate enough
+food and the draw of all players if all players starved
+
+Parameters:
+    num_players (int): the number of players
+
+Returns:
+    (int,)[]: the winner counts of player 1..num_players for every possible run outcome
+"""
+def run_outcomes(num_players):
+    outcomes = set()
+    for r in range(1, num_players + 1):
+        for players in itertools.combinations(range(num_players), r):
+            outcomes.add(tuple(1 if i in players else 0 for i in range(num_players)))
+    for i in range(num_players):
+        outcomes.add(tuple(2 if j == i else 0 for j in range(num_players)))
+    return sorted(outcomes)
+
+
+"""
+Enumerate the balancing values reachable with the remaining simulation runs
+
+Parameters:
+    winners (int[]): the winners of the runs so far
+    remaining (int): the number of runs still to simulate
+    num_players (int): the number of players
+    value (callable): computes the balancing value from a winner list
+    max_states (int): give up if the number of distinct winner counts exceeds this
+
+Returns:
+    set: all reachable values, None if the state space got too large
+"""
+def possible_values(winners, remaining, num_players, value, max_states=20000):
+    start = tuple(winners.count(i + 1) for i in range(num_players))
+    outcomes = run_outcomes(num_players)
+    states = {start}
+    for _ in range(remaining):
+        states = {tuple(s + o for s, o in zip(state, outcome)) for state in states for outcome in outcomes}
+        if len(states) > max_states:
+            return None
+    return {value([p + 1 for p in range(num_players) for _ in range(state[p])]) for state in states}
+
+
+"""
+The L1 deviation bound of Weissman et al. for an empirical distribution over k outcomes:
+with the given confidence ||p_hat - p||_1 <= eps after n samples
+
+Parameters:
+    n (int): the number of samples
+    k (int): the number of outcomes
+    confidence (float): the confidence level, e.g. 0.95
+
+Returns:
+    float: eps
+"""
+def l1_bound(n, k, confidence):
+    if n == 0:
+        return float("inf")
+    return math.sqrt(2 / n * (math.log(2 ** k - 2) - math.log(1 - confidence)))
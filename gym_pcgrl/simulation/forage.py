@@ -0,0 +1,334 @@
+"""
+A pure NumPy reimplementation of the forage game used for the balancing reward.
+
+It reproduces the rules of ConfigSim (resource depletion, foraging, drinking, starvation,
+dehydration, health regeneration and forest respawn) together with the behavior of the
+ForageOnly agent (move.forageDijkstra) directly on the rl map, so no nmmo realm is needed.
+"""
+import numpy as np
+
+GRASS, FOREST, STONE, WATER, SCRUB = 0, 1, 2, 3, 4
+HABITABLE = np.array([True, True, False, False, True])
+
+# same order as move.adjacentPos: north, west, south, east
+ADJACENT = [(-1, 0), (0, -1), (1, 0), (0, 1)]
+# the config values the forage game depends on
+GAME_SETTINGS = ["RESOURCE_BASE", "RESOURCE_DEPLETION_RATE", "RESOURCE_STARVATION_RATE",
+                 "RESOURCE_DEHYDRATION_RATE", "RESOURCE_FOREST_RESPAWN", "RESOURCE_HARVEST_RESTORE_FRACTION",
+                 "RESOURCE_HEALTH_REGEN_THRESHOLD", "RESOURCE_HEALTH_RESTORE_FRACTION", "PLAYER_BASE_HEALTH",
+                 "PLAYER_VISION_RADIUS"]
+# move deltas indexed by direction, -1 (no move) selects the trailing zero delta
+DELTAS = np.array(ADJACENT + [(0, 0)])
+
+
+"""
+Shift the last two axes of an array so that out[..., r, c] = a[..., r - dr, c - dc]
+
+Parameters:
+    a (ndarray): the array to shift
+    dr (int): the row offset
+    dc (int): the column offset
+    fill: the value of the cells shifted in from outside
+
+Returns:
+    ndarray: the shifted array
+"""
+def shift(a, dr, dc, fill):
+    out = np.full_like(a, fill)
+    h, w = a.shape[-2:]
+    out[..., max(dr, 0):h + min(dr, 0), max(dc, 0):w + min(dc, 0)] = \
+        a[..., max(-dr, 0):h + min(-dr, 0), max(-dc, 0):w + min(-dc, 0)]
+    return out
+
+
+class ForageSimulator:
+    """
+    Simulates the forage game of NMMODiff on rl maps (tiles 0-3 plus player tiles 4..4+N).
+
+    Parameters:
+        num_players (int): the number of players on the map
+        config (ConfigSim): optional nmmo config to read the game constants from
+        food_target (int): the number of eaten food that wins the game
+    """
+    RESOURCE_BASE = 100
+    RESOURCE_DEPLETION_RATE = 5
+    RESOURCE_STARVATION_RATE = 10
+    RESOURCE_DEHYDRATION_RATE = 10
+    RESOURCE_FOREST_RESPAWN = 0.025
+    RESOURCE_HARVEST_RESTORE_FRACTION = 1.0
+    RESOURCE_HEALTH_REGEN_THRESHOLD = 0.5
+    RESOURCE_HEALTH_RESTORE_FRACTION = 0.1
+    PLAYER_BASE_HEALTH = 100
+    PLAYER_VISION_RADIUS = 7
+
+    def __init__(self, num_players=2, config=None, food_target=5, cutoff=100):
+        self.num_players = num_players
+        self.food_target = food_target
+        self.cutoff = cutoff
+        if config is not None:
+            for name in GAME_SETTINGS:
+                setattr(self, name, getattr(config, name, getattr(self, name)))
+
+    """
+    Convert the rl map to the simulation grid with a stone border and the spawn positions
+
+    Parameters:
+        map (int[][]): the rl map
+
+    Returns:
+        int[][]: the padded tile grid
+        (int,int)[]: the spawn position (row, col) of every player on the padded grid
+    """
+    def load(self, map):
+        a = np.asarray(map)
+        spawns = []
+        for i in range(self.num_players):
+            y, x = np.where(a == (4 + i))
+            spawns.append((int(y[0]) + 1, int(x[0]) + 1))
+        grid = np.where(a >= 4, GRASS, a).astype(np.int8)
+        grid = np.pad(grid, 1, "constant", constant_values=STONE)
+        return grid, spawns
+
+    """
+    Simulate the map several times
+
+    Parameters:
+        map (int[][]): the rl map
+        runs (int): the number of games to simulate
+        rng (numpy.random.Generator): the random generator the games are seeded from
+        seeds (int[]): an explicit seed for every game, overrides rng
+
+    Returns:
+        int[][]: a winner list for every game, same encoding as NMMODiff.simulate_winner
+    """
+    def simulate(self, map, runs, rng=None, seeds=None):
+        return self.simulate_many([map], runs, rng, None if seeds is None else [seeds])[0]
+
+    """
+    Simulate several maps at once, all (map, run) games advance in lockstep on stacked arrays
+
+    Parameters:
+        maps (int[][][]): the rl maps, all of the same size
+        runs (int): the number of games to simulate per map
+        rng (numpy.random.Generator): the random generator the games are seeded from
+        seeds (int[][]): an explicit seed for every game of every map, overrides rng
+
+    Returns:
+        int[][][]: for every map a winner list for every game
+    """
+    def simulate_many(self, maps, runs, rng=None, seeds=None):
+        if seeds is None:
+            if rng is None:
+                rng = np.random.default_rng()
+            seeds = rng.integers(2 ** 32, size=(len(maps), runs))
+        rngs = [np.random.default_rng(int(seed)) for map_seeds in seeds for seed in map_seeds]
+        loaded = [self.load(map) for map in maps]
+        grid = np.stack([g for g, _ in loaded for _ in range(runs)])
+        pos = np.array([spawns for _, spawns in loaded for _ in range(runs)], dtype=np.int64)
+        winners = self.simulate_batch(grid, pos, rngs)
+        return [winners[i * runs:(i + 1) * runs] for i in range(len(maps))]
+
+    """
+    Run a batch of games until all of them are over, one tick is a handful of array operations
+    over the whole batch (see the module docstring for the rules)
+
+    Parameters:
+        grid (int[][][]): the padded tile grid of every game, modified in place
+        pos (int[][][]): the (row, col) position of every player in every game
+        rngs (numpy.random.Generator[]): the random generator of every game, used for the forest
+        respawn and the random move of agents that find no target
+
+    Returns:
+        int[][]: a winner list for every game
+    """
+    def simulate_batch(self, grid, pos, rngs):
+        games, n = pos.shape[:2]
+        base = self.RESOURCE_BASE
+        restore = int(np.floor(base * self.RESOURCE_HARVEST_RESTORE_FRACTION))
+        regen = int(np.floor(self.PLAYER_BASE_HEALTH * self.RESOURCE_HEALTH_RESTORE_FRACTION))
+        thresh = self.RESOURCE_HEALTH_REGEN_THRESHOLD * base
+
+        water_adjacent = self.water_adjacent(grid)
+        idx = np.repeat(np.arange(games)[:, None], n, axis=1)
+        food = np.full((games, n), base)
+        water = np.full((games, n), base)
+        health = np.full((games, n), self.PLAYER_BASE_HEALTH)
+        alive = np.ones((games, n), dtype=bool)
+        active = np.ones(games, dtype=bool)
+        depleted = np.zeros(grid.shape, dtype=bool)
+        prev_food = food.copy()
+        eaten = np.zeros((games, n), dtype=np.int64)
+        winners = [[] for _ in range(games)]
+
+        # observations after the spawn
+        moves = self.wander(self.forage_batch(grid, pos, food, water, alive), alive, rngs)
+        while active.any():
+            # resources and skills
+            live = active[:, None] & alive
+            rows, cols = pos[..., 0], pos[..., 1]
+            health = np.where(live & (food > thresh) & (water > thresh),
+                              np.minimum(health + regen, self.PLAYER_BASE_HEALTH), health)
+            health = np.where(live & (food == 0), np.maximum(health - self.RESOURCE_STARVATION_RATE, 0), health)
+            health = np.where(live & (water == 0), np.maximum(health - self.RESOURCE_DEHYDRATION_RATE, 0), health)
+
+            water = np.where(live, np.maximum(water - self.RESOURCE_DEPLETION_RATE, 0), water)
+            water = np.where(live & water_adjacent[idx, rows, cols], np.minimum(water + restore, base), water)
+
+            food = np.where(live, np.maximum(food - self.RESOURCE_DEPLETION_RATE, 0), food)
+            harvest = live & (grid[idx, rows, cols] == FOREST)
+            grid[idx[harvest], rows[harvest], cols[harvest]] = SCRUB
+            depleted[idx[harvest], rows[harvest], cols[harvest]] = True
+            food = np.where(harvest, np.minimum(food + restore, base), food)
+
+            # movement in player order, one agent per tile
+            for i in range(n):
+                nxt = pos[:, i] + DELTAS[moves[:, i]]
+                ok = live[:, i] & (moves[:, i] >= 0)
+                ok &= HABITABLE[grid[np.arange(games), nxt[:, 0], nxt[:, 1]]]
+                for j in range(n):
+                    if j != i:
+                        ok &= ~(alive[:, j] & (pos[:, j] == nxt).all(axis=1))
+                pos[ok, i] = nxt[ok]
+
+            # starvation
+            alive &= health > 0
+
+            # forest respawn
+            draws = np.ones(depleted.shape)
+            for g in np.flatnonzero(active):
+                draws[g] = rngs[g].random(depleted.shape[1:])
+            respawn = depleted & (draws <= self.RESOURCE_FOREST_RESPAWN)
+            grid[respawn] = FOREST
+            depleted &= ~respawn
+
+            # eaten food of the living agents
+            eaten += alive & (food > prev_food)
+            prev_food = np.where(alive, food, prev_food)
+
+            # stopping to starvation or if agents ate enough food
+            survivors = alive.sum(axis=1)
+            starved = active & (survivors <= 1)
+            fed = active[:, None] & (eaten >= self.food_target)
+            over = starved | fed.any(axis=1)
+            for g in np.flatnonzero(over):
+                if starved[g]:
+                    if survivors[g] == 1:
+                        winners[g].append(int(np.argmax(alive[g])) + 1)
+                    else:
+                        # a draw lists every player, so it stays a draw under relabeled players
+                        winners[g].extend(range(1, self.num_players + 1))
+                winners[g].extend(int(i) + 1 for i in np.flatnonzero(fed[g]))
+            active &= ~over
+
+            if active.any():
+                live = alive & active[:, None]
+                moves = self.wander(self.forage_batch(grid, pos, food, water, live), live, rngs)
+        return winners
+
+    """
+    Agents without a forage target move in a random direction (move.towards of (0, 0))
+    """
+    @staticmethod
+    def wander(moves, alive, rngs):
+        for g, i in np.argwhere(alive & (moves < 0)):
+            moves[g, i] = rngs[g].integers(len(ADJACENT))
+        return moves
+
+    @staticmethod
+    def water_adjacent(grid):
+        water = grid == WATER
+        return np.logical_or.reduce([shift(water, dr, dc, False) for dr, dc in ADJACENT])
+
+    """
+    The decisions of all living agents of a batch of games, one breadth first search per agent
+    that expands level by level over the whole batch. The node ranks reproduce the queue order
+    of move.forageDijkstra, so parents, rewards and tie breaking match the ForageOnly agent.
+
+    Parameters:
+        grid (int[][][]): the padded tile grid of every game
+        pos (int[][][]): the (row, col) position of every player in every game
+        food (int[][]): the food of every player
+        water (int[][]): the water of every player
+        alive (bool[][]): the agents to decide for, they also block the tiles they stand on
+
+    Returns:
+        int[][]: the direction index (into ADJACENT) of the next move of every player, -1 for no move
+    """
+    def forage_batch(self, grid, pos, food, water, alive):
+        moves = np.full(alive.shape, -1, dtype=np.int64)
+        games, agents = np.nonzero(alive)
+        if len(games) == 0:
+            return moves
+
+        height, width = grid.shape[1:]
+        cells = height * width
+        blocked = np.zeros(grid.shape, dtype=bool)
+        blocked[np.nonzero(alive)[0], pos[alive][:, 0], pos[alive][:, 1]] = True
+
+        k = np.arange(len(games))
+        tiles = grid[games]
+        sr, sc = pos[games, agents, 0], pos[games, agents, 1]
+        vision = self.PLAYER_VISION_RADIUS
+        insight = (np.abs(np.arange(height)[None, :, None] - sr[:, None, None]) <= vision) & \
+                  (np.abs(np.arange(width)[None, None, :] - sc[:, None, None]) <= vision)
+        water_adjacent = self.water_adjacent(np.where(insight, tiles, STONE)).reshape(len(k), cells)
+        forest = (tiles == FOREST).reshape(len(k), cells)
+        passable = (HABITABLE[tiles] & insight & ~blocked[games]).reshape(len(k), cells)
+
+        # parents[c, d] is the cell from which a step in direction d reaches c
+        r, c = np.divmod(np.arange(cells), width)
+        parents = np.stack([np.clip(r - dr, 0, height - 1) * width + np.clip(c - dc, 0, width - 1)
+                            for dr, dc in ADJACENT], axis=1)
+        directions = np.arange(len(ADJACENT))
+
+        limit = self.cutoff - 1
+        unseen = np.iinfo(np.int64).max // 8
+        start = sr * width + sc
+        rank = np.full((len(k), cells), unseen, dtype=np.int64)
+        f = np.zeros((len(k), cells), dtype=np.int64)
+        w = np.zeros((len(k), cells), dtype=np.int64)
+        first = np.full((len(k), cells), -1, dtype=np.int64)
+        rank[k, start] = 0
+        f[k, start] = food[games, agents]
+        w[k, start] = water[games, agents]
+        frontier = np.zeros((len(k), cells), dtype=bool)
+        frontier[k, start] = True
+        visited = frontier.copy()
+        count = np.ones(len(k), dtype=np.int64)
+
+        while True:
+            expand = np.where(frontier & (rank < limit), rank, unseen)
+            # the key encodes the direction in its lowest two bits
+            key = np.where(expand[:, parents] < unseen, expand[:, parents] * 4 + directions, unseen).min(axis=2)
+            child = (key < unseen) & ~visited & passable
+            if not child.any():
+                break
+            direction = np.where(child, key & 3, 0)
+
+            parent = parents[np.arange(cells), direction]
+            cf = np.maximum(np.take_along_axis(f, parent, axis=1) - 1, 0)
+            cf = np.where(forest, np.minimum(cf + self.RESOURCE_BASE // 2, self.RESOURCE_BASE), cf)
+            cw = np.maximum(np.take_along_axis(w, parent, axis=1) - 1, 0)
+            cw = np.where(water_adjacent, np.minimum(cw + self.RESOURCE_BASE // 2, self.RESOURCE_BASE), cw)
+            pf = np.take_along_axis(first, parent, axis=1)
+            f = np.where(child, cf, f)
+            w = np.where(child, cw, w)
+            first = np.where(child, np.where(pf < 0, direction, pf), first)
+
+            # children are queued in the order of their parents' rank and the neighbor order
+            order = np.empty_like(rank)
+            np.put_along_axis(order, np.argsort(np.where(child, key, unseen), axis=1), np.arange(cells)[None], axis=1)
+            rank = np.where(child, count[:, None] + order, rank)
+            count += child.sum(axis=1)
+            visited |= child
+            frontier = child
+
+        # target with the largest min(food, water), ties by max(food, water), then the earliest found
+        candidate = visited.copy()
+        candidate[k, start] = False
+        score = (np.minimum(f, w) * (self.RESOURCE_BASE + 1) + np.maximum(f, w)) * (cells + 1) + cells - rank
+        score = np.where(candidate, score, -1)
+        goal = score.argmax(axis=1)
+        found = score[k, goal] >= 0
+        moves[games[found], agents[found]] = first[k, goal][found]
+        return moves
@@ -0,0 +1,97 @@
+import multiprocessing
+import os
+import select
+import sys
+import traceback
+from multiprocessing.pool import RemoteTraceback
+
+import numpy as np
+
+"""
+Simulation runs in forked children. The parent loads the map into its warm env once and every
+child starts from a copy-on-write image of it, so neither the env nor the map is pickled and no
+child initializes an env. The children send their winners back over a pipe as a small int array
+after a status byte, or the traceback of their exception. Only available where os.fork is safe
+to use, i.e. on Linux.
+"""
+
+
+def fork_supported():
+    return hasattr(os, "fork") and sys.platform.startswith("linux")
+
+
+# the first byte a child writes into its pipe
+_OK, _ERROR = b"\x00", b"\x01"
+
+
+def _read_all(fd):
+    chunks = []
+    while True:
+        chunk = os.read(fd, 4096)
+        if not chunk:
+            break
+        chunks.append(chunk)
+    os.close(fd)
+    return b"".join(chunks)
+
+
+"""
+Play one simulation run per seed, each in its own forked child
+
+Parameters:
+    run (callable): plays a game in the child, run(seed) returns the winner list
+    seeds (int[]): the seed of every run, None entries for unseeded runs
+    max_children (int): the maximum number of children alive at once, defaults to the number of cpus
+
+Returns:
+    int[][]: the winner list of every run in the order of seeds, None for runs whose child died
+    without an answer (e.g. killed by a signal)
+
+Raises:
+    RuntimeError: if run raised in a child, with the traceback of the child as the cause, like
+    multiprocessing.Pool; raised once all children are reaped
+"""
+def fork_runs(run, seeds, max_children=None):
+    max_children = max(1, max_children or multiprocessing.cpu_count())
+    results = [None] * len(seeds)
+    pending = list(enumerate(seeds))[::-1]
+    children = {}
+    errors = {}
+
+    while pending or children:
+        while pending and len(children) < max_children:
+            i, seed = pending.pop()
+            read_fd, write_fd = os.pipe()
+            pid = os.fork()
+            if pid == 0:
+                os.close(read_fd)
+                code = 1
+                try:
+                    try:
+                        data = _OK + np.asarray(run(seed), dtype=np.int32).tobytes()
+                    except Exception:
+                        data = _ERROR + traceback.format_exc().encode()
+                    os.write(write_fd, data)
+                    code = 0
+                finally:
+                    # skip the cleanup of the parent's state (atexit, buffers) in the child
+                    os._exit(code)
+            os.close(write_fd)
+            children[read_fd] = (pid, i)
+
+        # a pipe becomes readable once its child wrote its winners or exited
+        ready, _, _ = select.select(list(children), [], [])
+        for fd in ready:
+            pid, i = children.pop(fd)
+            data = _read_all(fd)
+            _, status = os.waitpid(pid, 0)
+            if not (os.WIFEXITED(status) and os.WEXITSTATUS(status) == 0):
+                continue
+            if data[:1] == _ERROR:
+                errors[i] = data[1:].decode(errors="replace")
+            else:
+                results[i] = np.frombuffer(data[1:], dtype=np.int32).tolist()
+    if errors:
+        raise RuntimeError(f"Simulation runs {sorted(errors)} failed in forked children") \
+            from RemoteTraceback(errors[min(errors)])
+    return results
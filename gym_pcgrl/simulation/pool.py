@@ -0,0 +1,96 @@
+import multiprocessing
+from concurrent.futures import Future
+
+import numpy as np
+
+"""
+The simulator of the current worker process. It is built once by the pool initializer
+and reused for every request the worker receives.
+"""
+_simulator = None
+
+
+def _init_worker(factory, args):
+    global _simulator
+    _simulator = factory(*args)
+
+
+def _simulate(map, runs, seeds=None):
+    if seeds is None:
+        return _simulator.simulate(map, runs)
+    return _simulator.simulate(map, runs, seeds=seeds)
+
+
+"""
+A long-lived pool of simulation workers. Each worker builds its own simulator (e.g. a warm
+nmmo.Env) once at startup, so a request only transfers the map array and the winner lists
+instead of pickling the whole problem object.
+
+Parameters:
+    factory (callable): a picklable callable that builds the simulator inside a worker, the
+    simulator has to provide simulate(map, runs) returning a list of winner lists
+    args (tuple): the arguments passed to the factory
+    processes (int): the number of worker processes, defaults to the number of cpus
+"""
+
+
+class SimulationPool:
+    def __init__(self, factory, args=(), processes=None):
+        self.processes = processes or multiprocessing.cpu_count()
+        self._pool = multiprocessing.Pool(self.processes, initializer=_init_worker, initargs=(factory, args))
+
+    """
+    Split the simulation runs as evenly as possible over the workers
+
+    Parameters:
+        runs (int): the number of simulation runs
+
+    Returns:
+        int[]: the number of runs for each submitted task
+    """
+    def split(self, runs):
+        chunks = [runs // self.processes] * self.processes
+        for i in range(runs % self.processes):
+            chunks[i] += 1
+        return [c for c in chunks if c > 0]
+
+    """
+    Simulate a map several times on the warm workers
+
+    Parameters:
+        map (int[][]): the rl map to simulate
+        runs (int): the number of simulation runs
+        seeds (int[]): an optional seed for every run
+
+    Returns:
+        int[][]: a winner list for every simulation run
+    """
+    def simulate(self, map, runs, seeds=None):
+        results = self._pool.starmap(_simulate, self.tasks(map, runs, seeds))
+        return [winners for chunk in results for winners in chunk]
+
+    """
+    Like simulate, but returns at once
+
+    Returns:
+        concurrent.futures.Future: resolves to a winner list for every simulation run
+    """
+    def simulate_async(self, map, runs, seeds=None):
+        future = Future()
+        self._pool.starmap_async(_simulate, self.tasks(map, runs, seeds),
+                                 callback=lambda results: future.set_result(
+                                     [winners for chunk in results for winners in chunk]),
+                                 error_callback=future.set_exception)
+        return future
+
+    def tasks(self, map, runs, seeds=None):
+        map = np.asarray(map, dtype=np.uint8)
+        tasks = []
+        for n in self.split(runs):
+            tasks.append((map, n, None if seeds is None else seeds[:n]))
+            seeds = None if seeds is None else seeds[n:]
+        return tasks
+
+    def close(self):
+        self._pool.terminate()
+        self._pool.join()
@@ -0,0 +1,69 @@
+"""
+Simulation profiles, named sets of the nmmo game systems a balancing simulation runs with.
+
+The simulation configs inherit nmmo.config.AllGameSystems so every system has its constants,
+a profile only switches off the systems the balancing game does not use. The game on the rl
+maps is decided by terrain, food, water and starvation, which the forage_only profile keeps.
+"""
+
+# game systems of nmmo, each one is switched by its <SYSTEM>_SYSTEM_ENABLED flag
+SYSTEMS = ("TERRAIN", "RESOURCE", "COMBAT", "NPC", "PROGRESSION", "ITEM", "EQUIPMENT", "PROFESSION",
+           "EXCHANGE", "COMMUNICATION")
+
+# enabled systems of every profile, None keeps the flags of the config as they are
+SIM_PROFILES = {
+    "all": None,
+    "forage_only": ("TERRAIN", "RESOURCE"),
+    "forage_combat": ("TERRAIN", "RESOURCE", "COMBAT"),
+}
+
+_configs = {}
+
+
+"""
+Rebuild a pickled config of a simulation profile, see _reduce_profile
+"""
+def _restore_profile(config, profile, state):
+    cls = profile_config(config, profile)
+    instance = cls.__new__(cls)
+    instance.__dict__.update(state)
+    return instance
+
+
+# pickled configs of a profile are rebuilt through profile_config, so they also load in
+# processes that did not derive the profile class yet
+def _reduce_profile(self):
+    return _restore_profile, (self.SIM_BASE_CONFIG, self.SIM_PROFILE, dict(self.__dict__))
+
+
+"""
+Derive the config class of a simulation profile
+
+Parameters:
+    config (type): the nmmo config class of the simulation, e.g. ConfigSim
+    profile (str): the name of the profile in SIM_PROFILES
+
+Returns:
+    type: a subclass of config with only the systems of the profile enabled, the same
+    class for repeated calls so configs of one profile compare equal
+"""
+def profile_config(config, profile):
+    if profile not in SIM_PROFILES:
+        raise ValueError(f"Unknown simulation profile {profile}, expected one of {list(SIM_PROFILES)}")
+    systems = SIM_PROFILES[profile]
+    if systems is None:
+        return config
+    if (config, profile) not in _configs:
+        flags = {f"{system}_SYSTEM_ENABLED": system in systems for system in SYSTEMS}
+        flags["SIM_PROFILE"] = profile
+        flags["SIM_BASE_CONFIG"] = config
+        flags["__reduce__"] = _reduce_profile
+        name = f"{config.__name__}_{profile}"
+        if name in globals():
+            # another config class of the same name
+            name = f"{name}_{len(_configs)}"
+        flags["__module__"] = __name__
+        flags["__qualname__"] = name
+        # bound to the module, so the class itself pickles by reference
+        globals()[name] = _configs[(config, profile)] = type(name, (config,), flags)
+    return _configs[(config, profile)]
@@ -0,0 +1,273 @@
+import multiprocessing
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from multiprocessing.managers import BaseManager
+
+import numpy as np
+
+from gym_pcgrl.simulation.pool import _init_worker, _simulate
+
+"""
+One simulation scheduler for all envs of a process or a machine. With several envs (e.g. the
+copies of a SubprocVecEnv) each owning a pool, the workers oversubscribe the cores. The envs
+submit their runs to the scheduler instead, which owns the only pool, sized to the available
+cores, and serves the envs round robin so no env starves behind another one's batch.
+"""
+
+
+"""
+The number of cores this process may run on, respecting cpu affinity masks (e.g. of containers)
+"""
+def available_cpus():
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return multiprocessing.cpu_count()
+
+
+class _Request:
+    def __init__(self, runs):
+        self.results = [None] * runs
+        self.remaining = 0
+        self.future = Future()
+
+
+class SimulationScheduler:
+    """
+    Owns a pool of warm simulation workers and schedules the runs of many clients on it
+
+    Parameters:
+        factory (callable): builds the simulator inside a worker, see SimulationPool
+        args (tuple): the arguments passed to the factory
+        workers (int): the number of worker processes, defaults to the available cores
+        chunk (int): the number of runs per task, smaller chunks interleave clients more finely
+    """
+    def __init__(self, factory, args=(), workers=None, chunk=2):
+        self.workers = workers or available_cpus()
+        self.chunk = chunk
+        self._pool = multiprocessing.Pool(self.workers, initializer=_init_worker, initargs=(factory, args))
+        self._lock = threading.Lock()
+        # pending tasks of every client, the client served last moves to the end
+        self._queues = OrderedDict()
+        self._in_flight = 0
+        self._started = time.perf_counter()
+        self._busy = 0.0
+        self._tasks = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+
+    """
+    Simulate a map on the shared workers, blocks until all runs are done
+
+    Parameters:
+        client (str): the id of the submitting env, tasks are queued fairly per client
+        map (int[][]): the rl map to simulate
+        runs (int): the number of simulation runs
+        seeds (int[]): an optional seed for every run
+
+    Returns:
+        int[][]: a winner list for every simulation run
+    """
+    def simulate(self, client, map, runs, seeds=None):
+        return self.submit(client, map, runs, seeds).result()
+
+    """
+    Like simulate, but returns at once. Only for clients in the process of the scheduler.
+
+    Returns:
+        concurrent.futures.Future: resolves to a winner list for every simulation run
+    """
+    def submit(self, client, map, runs, seeds=None):
+        map = np.asarray(map, dtype=np.uint8)
+        request = _Request(runs)
+        if runs == 0:
+            request.future.set_result([])
+        now = time.perf_counter()
+        with self._lock:
+            queue = self._queues.setdefault(client, deque())
+            for start in range(0, runs, self.chunk):
+                n = min(self.chunk, runs - start)
+                task_seeds = None if seeds is None else list(seeds[start:start + n])
+                queue.append((request, start, n, map, task_seeds, now))
+                request.remaining += 1
+            self._dispatch()
+        return request.future
+
+    def _dispatch(self):
+        # called with the lock held
+        while self._in_flight < self.workers:
+            client = next((c for c, q in self._queues.items() if q), None)
+            if client is None:
+                return
+            task = self._queues[client].popleft()
+            self._queues.move_to_end(client)
+            request, start, n, map, seeds, enqueued = task
+            dispatched = time.perf_counter()
+            wait = dispatched - enqueued
+            self._wait_total += wait
+            self._wait_max = max(self._wait_max, wait)
+            self._in_flight += 1
+            self._pool.apply_async(_simulate, (map, n, seeds),
+                                   callback=lambda r, t=task, d=dispatched: self._finish(t, d, r),
+                                   error_callback=lambda e, t=task, d=dispatched: self._finish(t, d, None, e))
+
+    def _finish(self, task, dispatched, results, error=None):
+        request, start, n = task[:3]
+        with self._lock:
+            self._in_flight -= 1
+            self._tasks += 1
+            self._busy += time.perf_counter() - dispatched
+            if request.future.done():
+                pass
+            elif error is not None:
+                request.future.set_exception(error)
+            else:
+                request.results[start:start + n] = results
+                request.remaining -= 1
+                if request.remaining == 0:
+                    request.future.set_result(request.results)
+            self._dispatch()
+
+    """
+    Forget a client that will not submit anymore
+    """
+    def release(self, client):
+        with self._lock:
+            if client in self._queues and not self._queues[client]:
+                del self._queues[client]
+
+    """
+    Load of the scheduler
+
+    Returns:
+        dict: the number of workers, the queued tasks (in total and per client), the tasks
+        running and done, the mean and max time tasks waited in the queue in seconds and the
+        share of worker time spent simulating since the start
+    """
+    def metrics(self):
+        with self._lock:
+            elapsed = time.perf_counter() - self._started
+            return {"workers": self.workers,
+                    "queue_depth": sum(len(q) for q in self._queues.values()),
+                    "queue_depth_per_client": {c: len(q) for c, q in self._queues.items()},
+                    "in_flight": self._in_flight,
+                    "tasks_done": self._tasks,
+                    "wait_mean": self._wait_total / max(1, self._tasks + self._in_flight),
+                    "wait_max": self._wait_max,
+                    "utilization": self._busy / (self.workers * elapsed) if elapsed > 0 else 0.0}
+
+    def close(self):
+        self._pool.terminate()
+        self._pool.join()
+
+
+class SchedulerClient:
+    """
+    The pool interface of NMMODiff on top of a scheduler, which may live in another process
+
+    Parameters:
+        scheduler (SimulationScheduler): the scheduler or a proxy of it
+        client (str): the id of this client, defaults to one unique per process and instance
+    """
+    def __init__(self, scheduler, client=None):
+        self.scheduler = scheduler
+        self.client = client or f"{os.getpid()}-{id(self)}"
+        self._waiters = None
+
+    def simulate(self, map, runs, seeds=None):
+        return self.scheduler.simulate(self.client, np.asarray(map, dtype=np.uint8), runs, seeds)
+
+    """
+    Submit without blocking. A scheduler in another process cannot hand out futures, its
+    requests are waited for on a few threads, at most one per worker of the scheduler.
+
+    Returns:
+        concurrent.futures.Future: resolves to a winner list for every simulation run
+    """
+    def simulate_async(self, map, runs, seeds=None):
+        if isinstance(self.scheduler, SimulationScheduler):
+            return self.scheduler.submit(self.client, map, runs, seeds)
+        if self._waiters is None:
+            self._waiters = ThreadPoolExecutor(max_workers=self.scheduler.metrics()["workers"])
+        return self._waiters.submit(self.simulate, map, runs, seeds)
+
+    def metrics(self):
+        return self.scheduler.metrics()
+
+    def close(self):
+        # the scheduler is shared and outlives its clients
+        if self._waiters is not None:
+            self._waiters.shutdown(wait=True)
+            self._waiters = None
+        self.scheduler.release(self.client)
+
+
+class _SchedulerServer(BaseManager):
+    pass
+
+
+class _SchedulerConnection(BaseManager):
+    pass
+
+
+_schedulers = {}
+
+
+"""
+Get the scheduler shared by all envs of this process, one per simulator factory and arguments
+"""
+def process_scheduler(factory, args=(), workers=None):
+    key = (factory, tuple(args))
+    if key not in _schedulers:
+        _schedulers[key] = SimulationScheduler(factory, args, workers)
+    return _schedulers[key]
+
+
+"""
+Serve a scheduler to the other processes of the machine, e.g. the envs of a SubprocVecEnv. The
+server runs in a thread of the calling process, which has to stay alive while envs submit.
+
+The server unpickles what its clients send, so the key has to stay secret. It defaults to the
+authkey of this process, which the processes started by multiprocessing (e.g. the envs of a
+SubprocVecEnv) inherit, other clients need the returned key.
+
+Parameters:
+    scheduler (SimulationScheduler): the scheduler to serve
+    address ((str, int)): the address to listen on, port 0 picks a free port
+    authkey (bytes): the key clients have to present, defaults to the authkey of this process
+
+Returns:
+    (str, int): the address the clients connect to
+    bytes: the key the clients have to present
+"""
+def serve_scheduler(scheduler, address=("127.0.0.1", 0), authkey=None):
+    if authkey is None:
+        authkey = multiprocessing.current_process().authkey
+    _SchedulerServer.register("get_scheduler", callable=lambda: scheduler)
+    server = _SchedulerServer(address=address, authkey=authkey).get_server()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server.address, bytes(authkey)
+
+
+"""
+Connect to a scheduler served by serve_scheduler
+
+Parameters:
+    address ((str, int) or str): the address of the server, also as "host:port"
+    authkey (bytes): the key returned by serve_scheduler, defaults to the authkey of this process
+
+Returns:
+    SimulationScheduler: a proxy of the served scheduler
+"""
+def connect_scheduler(address, authkey=None):
+    if authkey is None:
+        authkey = multiprocessing.current_process().authkey
+    if isinstance(address, str):
+        host, port = address.rsplit(":", 1)
+        address = (host, int(port))
+    _SchedulerConnection.register("get_scheduler")
+    manager = _SchedulerConnection(address=address, authkey=authkey)
+    manager.connect()
+    return manager.get_scheduler()
@@ -0,0 +1,56 @@
+import random
+
+import numpy as np
+
+from gym_pcgrl.simulation.cache import SimulationCache
+
+"""
+Seeds for reproducible simulations. Every run gets its own seed derived from the global seed,
+a hash of the map and the index of the run, so the same map gives the same winners in every
+process, no matter how the runs are split into batches or over workers.
+"""
+
+
+"""
+Derive the seeds of simulation runs
+
+Parameters:
+    seed (int): the global seed
+    map (int[][]): the rl map, None for seeds shared by all maps (common random numbers)
+    runs (int): the number of runs
+    start (int): the index of the first run
+
+Returns:
+    int[]: a 32 bit seed for every run
+"""
+def run_seeds(seed, map, runs, start=0):
+    entropy = [seed] if map is None else [seed, int(SimulationCache.key(map), 16)]
+    return [int(np.random.SeedSequence(entropy, spawn_key=(i,)).generate_state(1)[0])
+            for i in range(start, start + runs)]
+
+
+"""
+Seed the global random and numpy.random state, used by nmmo itself
+"""
+def seed_globals(seed):
+    random.seed(seed)
+    np.random.seed(seed)
+
+
+"""
+Reset an env on a global random state derived from the map and restore the previous state
+afterwards, so the reset env is the same in every process, no matter which run of the map
+came first
+
+Parameters:
+    env (nmmo.Env): the env, its map already updated
+    key (str): the key of the map, see SimulationCache.key
+"""
+def reset_on_map(env, key):
+    states = random.getstate(), np.random.get_state()
+    seed_globals(int(key[:8], 16))
+    try:
+        env.reset()
+    finally:
+        random.setstate(states[0])
+        np.random.set_state(states[1])
@@ -0,0 +1,104 @@
+from gym_pcgrl.simulation.analyzer import StaticAnalyzer
+from gym_pcgrl.simulation.cache import SimulationCache
+from gym_pcgrl.simulation.pool import SimulationPool
+from gym_pcgrl.simulation.scheduler import SchedulerClient, connect_scheduler, process_scheduler
+from gym_pcgrl.simulation.shm import SharedMemoryPool
+
+"""
+The simulation service of a problem: the SimulationConfig together with everything built from
+it, the warm worker pool (or the client of a scheduler), the result cache and the static
+analyzer. The cache keys come from the whole config, see SimulationConfig.cache_key.
+"""
+
+
+class SimulationService:
+    """
+    Parameters:
+        config (SimulationConfig): the settings of the simulations
+        factory (callable): builds the simulator inside a worker, see SimulationPool
+        args (tuple): the arguments passed to the factory
+        shape (int, int): the shape of the rl maps, for the shared memory transport
+        num_players (int): the number of players on the maps
+    """
+    def __init__(self, config, factory, args=(), shape=(6, 6), num_players=2):
+        self.config = config
+        self.factory = factory
+        self.args = args
+        self.shape = tuple(shape)
+        self.num_players = num_players
+        self.pool = None
+        self.cache = None
+        if config.cache > 0 or config.cache_path is not None:
+            self.cache = SimulationCache(config.cache or 1024, config.cache_path)
+        self.analyzer = None
+        if config.precheck:
+            self.analyzer = StaticAnalyzer(num_players, config.precheck_symmetric)
+
+    """
+    If the runs go to worker processes (a pool or a scheduler) instead of this process
+    """
+    @property
+    def remote(self):
+        return self.pool is not None or self.config.processes > 0 or self.config.scheduler is not None
+
+    """
+    Get the warm worker pool, it is created once and reused for all following simulations
+
+    Parameters:
+        processes (int): the number of workers if the pool does not exist yet, defaults to
+        config.processes
+
+    Returns:
+        the pool, a SimulationPool, SharedMemoryPool or SchedulerClient
+    """
+    def get_pool(self, processes=None):
+        if self.pool is not None:
+            return self.pool
+        config = self.config
+        if config.scheduler == "process":
+            self.pool = SchedulerClient(process_scheduler(self.factory, self.args,
+                                                          processes or config.processes or None))
+        elif isinstance(config.scheduler, tuple) and isinstance(config.scheduler[-1], bytes):
+            # (address, authkey) of a scheduler started with serve_scheduler
+            self.pool = SchedulerClient(connect_scheduler(*config.scheduler))
+        elif config.scheduler is not None:
+            self.pool = SchedulerClient(connect_scheduler(config.scheduler))
+        elif config.transport == "shm":
+            self.pool = SharedMemoryPool(self.factory, self.args, processes or config.processes, self.shape,
+                                         max_winners=2 * self.num_players)
+        else:
+            self.pool = SimulationPool(self.factory, self.args, processes or config.processes)
+        return self.pool
+
+    """
+    Compute the cache key of a map
+
+    Parameters:
+        map (int[][]): the rl map
+        settings (tuple): what else the winners depend on, e.g. the runs and the seed
+
+    Returns:
+        str: the key
+    """
+    def key(self, map, settings=()):
+        return SimulationCache.key(map, (self.config.cache_key(),) + tuple(settings))
+
+    """
+    The counters of the cache, the analyzer and the scheduler
+    """
+    def stats(self):
+        stats = {}
+        if self.cache is not None:
+            stats.update(self.cache.stats())
+        if self.analyzer is not None:
+            stats.update(self.analyzer.stats())
+        if isinstance(self.pool, SchedulerClient):
+            metrics = self.pool.metrics()
+            for name in ("queue_depth", "wait_mean", "utilization"):
+                stats["scheduler_" + name] = metrics[name]
+        return stats
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.close()
+            self.pool = None
@@ -0,0 +1,263 @@
+import multiprocessing
+import queue
+import traceback
+from multiprocessing.pool import RemoteTraceback
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy as np
+
+"""
+Shared-memory transport for the simulation workers. Maps, seeds and winners live in a ring of
+fixed-size slots in one shared memory block, a request only sends the index of its slot to a
+worker and the worker answers with the same index once the winners are written. A failed job is answered with
+the inverted index, its traceback goes to a separate error queue first.
+"""
+
+
+class SimulationRing:
+    """
+    The slots of the shared memory block as numpy views. Every slot holds one uint8 map, up
+    to max_runs seeds (-1 for unseeded runs) and the winner lists of these runs, padded with 0.
+
+    Parameters:
+        slots (int): the number of slots
+        shape (int, int): the shape of the rl maps
+        max_runs (int): the maximum number of runs per slot
+        max_winners (int): the maximum length of the winner list of one run
+        name (str): the name of an existing block to attach to, None creates a new one
+    """
+    def __init__(self, slots, shape, max_runs, max_winners, name=None):
+        self.spec = (slots, tuple(shape), max_runs, max_winners)
+        fields = [("maps", (slots,) + tuple(shape), np.uint8),
+                  ("runs", (slots,), np.int32),
+                  ("seeds", (slots, max_runs), np.int64),
+                  ("counts", (slots, max_runs), np.int8),
+                  ("winners", (slots, max_runs, max_winners), np.int8)]
+        # every field starts 8 byte aligned
+        sizes = [-(-int(np.prod(s)) * np.dtype(d).itemsize // 8) * 8 for _, s, d in fields]
+
+        self.owner = name is None
+        self.shm = SharedMemory(name=name, create=self.owner, size=sum(sizes))
+        self.name = self.shm.name
+        offset = 0
+        for (field, field_shape, dtype), size in zip(fields, sizes):
+            setattr(self, field, np.ndarray(field_shape, dtype=dtype, buffer=self.shm.buf, offset=offset))
+            offset += size
+
+    def close(self):
+        # the views have to go before the buffer can be released
+        for field in ("maps", "runs", "seeds", "counts", "winners"):
+            setattr(self, field, None)
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+
+def _serve(name, spec, factory, args, jobs, done, errors):
+    ring = SimulationRing(*spec, name=name)
+    simulator = factory(*args)
+    max_winners = spec[3]
+    while True:
+        slot = jobs.get()
+        if slot is None:
+            break
+        try:
+            runs = int(ring.runs[slot])
+            seeds = ring.seeds[slot, :runs]
+            map = ring.maps[slot].copy()
+            if seeds[0] < 0:
+                results = simulator.simulate(map, runs)
+            else:
+                results = simulator.simulate(map, runs, seeds=seeds.tolist())
+            ring.winners[slot] = 0
+            for i, winners in enumerate(results):
+                if len(winners) > max_winners:
+                    raise ValueError(f"{len(winners)} winners do not fit into a slot of {max_winners}")
+                ring.counts[slot, i] = len(winners)
+                ring.winners[slot, i, :len(winners)] = winners
+            done.put(slot)
+        except Exception:
+            errors.put((slot, traceback.format_exc()))
+            done.put(~slot)
+    ring.close()
+
+
+"""
+A pool of warm simulation workers that exchange maps and winners through a SimulationRing,
+a drop-in replacement for SimulationPool
+
+Parameters:
+    factory (callable): builds the simulator inside a worker, see SimulationPool
+    args (tuple): the arguments passed to the factory
+    processes (int): the number of worker processes, defaults to the number of cpus
+    shape (int, int): the shape of the rl maps
+    max_runs (int): the maximum number of runs per job, more runs are split over several slots
+    max_winners (int): the maximum length of the winner list of one run
+    slots (int): the number of slots of the ring, defaults to two per worker
+    timeout (float): the seconds to wait for any answer before giving up, None waits as long as
+    all workers are alive
+"""
+
+
+class SharedMemoryPool:
+    # seconds between two checks of the workers while waiting for an answer
+    POLL_INTERVAL = 1.0
+
+    def __init__(self, factory, args=(), processes=None, shape=(6, 6), max_runs=16, max_winners=8, slots=None,
+                 timeout=None):
+        self.processes = processes or multiprocessing.cpu_count()
+        self.max_runs = max_runs
+        self.timeout = timeout
+        self.factory = factory
+        self.args = args
+        self.ring = SimulationRing(slots or 2 * self.processes, shape, max_runs, max_winners)
+        self._start()
+
+    """
+    Start the workers on a free ring and empty queues
+    """
+    def _start(self):
+        self._free = list(range(self.ring.spec[0]))
+        self._jobs = multiprocessing.SimpleQueue()
+        self._done = multiprocessing.Queue()
+        self._errors = multiprocessing.SimpleQueue()
+        # tracebacks read from the error queue before the answer of their slot
+        self._tracebacks = {}
+        self._workers = [multiprocessing.Process(target=_serve, daemon=True,
+                                                 args=(self.ring.name, self.ring.spec, self.factory, self.args,
+                                                       self._jobs, self._done, self._errors))
+                         for _ in range(self.processes)]
+        for worker in self._workers:
+            worker.start()
+
+    """
+    Replace the workers after a dead worker or a timeout. The slots in flight are lost with
+    their workers and late answers would stay in the queues, so all of them start over.
+    """
+    def restart(self):
+        for worker in self._workers:
+            if worker.is_alive():
+                worker.terminate()
+            worker.join()
+        self._done.close()
+        self._done.cancel_join_thread()
+        self._start()
+
+    """
+    Wait for the next answer of the workers
+
+    Returns:
+        int: the slot of a finished job, inverted for a failed one
+
+    Raises:
+        RuntimeError: if a worker died, its jobs would never be answered
+        TimeoutError: if no answer came within timeout seconds
+
+    Either error leaves slots in flight, simulate_many restarts the workers then
+    """
+    def wait(self):
+        waited = 0
+        while True:
+            interval = self.POLL_INTERVAL if self.timeout is None else min(self.POLL_INTERVAL, self.timeout - waited)
+            try:
+                return self._done.get(timeout=max(interval, 0))
+            except queue.Empty:
+                waited += interval
+            dead = [worker for worker in self._workers if not worker.is_alive()]
+            if dead:
+                raise RuntimeError(f"Simulation worker {dead[0].pid} died with exit code {dead[0].exitcode}")
+            if self.timeout is not None and waited >= self.timeout:
+                raise TimeoutError(f"No simulation worker answered within {self.timeout} seconds")
+
+    """
+    Split the simulation runs of one map over the workers, at most max_runs per job
+    """
+    def split(self, runs):
+        jobs = max(self.processes, -(-runs // self.max_runs))
+        chunks = [runs // jobs] * jobs
+        for i in range(runs % jobs):
+            chunks[i] += 1
+        return [c for c in chunks if c > 0]
+
+    """
+    Simulate several maps on the warm workers, the jobs of all maps are in flight at once
+
+    Parameters:
+        maps (int[][][]): the rl maps to simulate
+        runs (int): the number of simulation runs per map
+        seeds (int[][]): an optional seed list for every map
+
+    Returns:
+        int[][][]: a winner list for every simulation run of every map
+    """
+    def simulate_many(self, maps, runs, seeds=None):
+        maps = [np.asarray(map, dtype=np.uint8) for map in maps]
+        for map in maps:
+            if map.shape != self.ring.maps.shape[1:]:
+                raise ValueError(f"Map of shape {map.shape} does not fit the slots of shape "
+                                 f"{self.ring.maps.shape[1:]}")
+
+        pending = []
+        for m in range(len(maps)):
+            start = 0
+            for n in self.split(runs):
+                pending.append((m, start, n))
+                start += n
+        pending.reverse()
+
+        results = [[None] * runs for _ in maps]
+        owners = {}
+        failures = {}
+        while pending or owners:
+            while pending and self._free:
+                m, start, n = pending.pop()
+                slot = self._free.pop()
+                self.ring.maps[slot] = maps[m]
+                self.ring.runs[slot] = n
+                self.ring.seeds[slot] = -1
+                if seeds is not None and seeds[m] is not None:
+                    self.ring.seeds[slot, :n] = seeds[m][start:start + n]
+                owners[slot] = (m, start, n)
+                self._jobs.put(slot)
+
+            try:
+                slot = self.wait()
+            except (RuntimeError, TimeoutError):
+                # the pool is broken, the next call gets fresh workers
+                self.restart()
+                raise
+            failed = slot < 0
+            if failed:
+                slot = ~slot
+            m, start, n = owners.pop(slot)
+            self._free.append(slot)
+            if failed:
+                # put before the answer, so it is already in the error queue
+                while slot not in self._tracebacks:
+                    error_slot, error = self._errors.get()
+                    self._tracebacks[error_slot] = error
+                # keep collecting, the answers of the other jobs would otherwise stay in the queue
+                failures.setdefault(m, self._tracebacks.pop(slot))
+                continue
+            for i in range(n):
+                results[m][start + i] = self.ring.winners[slot, i, :self.ring.counts[slot, i]].tolist()
+        if failures:
+            # like multiprocessing.Pool, the traceback of the worker becomes the cause
+            raise RuntimeError(f"Simulation workers failed on the maps {sorted(failures)}") \
+                from RemoteTraceback(failures[min(failures)])
+        return results
+
+    """
+    Simulate a map several times on the warm workers, see SimulationPool.simulate
+    """
+    def simulate(self, map, runs, seeds=None):
+        return self.simulate_many([map], runs, None if seeds is None else [seeds])[0]
+
+    def close(self):
+        for _ in self._workers:
+            self._jobs.put(None)
+        for worker in self._workers:
+            worker.join(timeout=5)
+            if worker.is_alive():
+                worker.terminate()
+        self.ring.close()
@@ -0,0 +1,111 @@
+import numpy as np
+
+"""
+Canonical forms of NMMODiff maps (tiles 0-3 plus player tiles 4..4+N). The forage game on a
+stone bordered map does not change under the 8 dihedral transforms, and the balancing of
+calc_balancing2 does not change if the player ids are permuted, as long as the winner ids are
+remapped. Mapping all equivalent maps to one canonical map lets the simulation cache share
+results between them. Note that the agents break ties in a fixed direction and player order,
+so equivalent maps are equal in their game rules but not necessarily in every simulated move.
+"""
+
+PLAYER_OFFSET = 4
+
+
+"""
+All dihedral transforms of a map that keep its shape, 8 for square maps and 4 otherwise
+
+Parameters:
+    a (int[][]): the map
+
+Returns:
+    int[][][]: the transformed maps, the identity first
+"""
+def dihedral_transforms(a):
+    a = np.asarray(a)
+    transforms = []
+    for m in [a, np.fliplr(a)]:
+        for k in range(4):
+            t = np.rot90(m, k)
+            if t.shape == a.shape:
+                transforms.append(t)
+    return transforms
+
+
+"""
+Relabel the players in the order of their first appearance (row-major)
+
+Parameters:
+    a (int[][]): the map
+    num_players (int): the number of players
+
+Returns:
+    int[][]: the relabeled map
+    int[]: perm with perm[c - 1] the original id of the relabeled player c
+"""
+def relabel_players(a, num_players):
+    flat = a.flatten()
+    players = flat[flat >= PLAYER_OFFSET]
+    perm = []
+    for p in players:
+        if p - PLAYER_OFFSET + 1 not in perm:
+            perm.append(int(p) - PLAYER_OFFSET + 1)
+    # players missing on the map keep the remaining ids in their original order
+    perm.extend(i for i in range(1, num_players + 1) if i not in perm)
+
+    lookup = np.arange(max(flat.max(), PLAYER_OFFSET + num_players - 1) + 1)
+    for c, o in enumerate(perm):
+        lookup[PLAYER_OFFSET + o - 1] = PLAYER_OFFSET + c
+    return lookup[a], perm
+
+
+"""
+Compute the canonical form of a map, the lexicographically smallest of its equivalent maps
+
+Parameters:
+    map (int[][]): the rl map
+    num_players (int): the number of players
+    relabel (bool): also treat maps that only differ in the player ids as equivalent
+
+Returns:
+    int[][]: the canonical map
+    int[]: perm with perm[c - 1] the original id of the canonical player c, translate winners
+    of the canonical map back with remap_winners
+"""
+def canonical_map(map, num_players, relabel=True):
+    best, best_perm, best_bytes = None, None, None
+    for t in dihedral_transforms(map):
+        if relabel:
+            t, perm = relabel_players(t, num_players)
+        else:
+            perm = list(range(1, num_players + 1))
+        b = np.ascontiguousarray(t, dtype=np.uint8).tobytes()
+        if best_bytes is None or b < best_bytes:
+            best, best_perm, best_bytes = t, perm, b
+    return np.ascontiguousarray(best), best_perm
+
+
+"""
+Translate the winner lists of all simulation runs with a player permutation. A draw lists all
+players, so it translates to a draw again
+
+Parameters:
+    results (int[][]): a winner list for every simulation run
+    perm (int[]): perm[c - 1] is the id that player c is translated to
+
+Returns:
+    int[][]: the translated winner lists
+"""
+def remap_winners(results, perm):
+    return [[perm[w - 1] for w in winners] for winners in results]
+
+
+"""
+The inverse of a player permutation, remap_winners with it translates original winners to
+canonical ones
+"""
+def invert_permutation(perm):
+    inverse = [0] * len(perm)
+    for c, o in enumerate(perm):
+        inverse[o - 1] = c + 1
+    return inverse
@@ -0,0 +1,26 @@
+import pytest
+
+from gym_pcgrl.envs.probs.nmmo_diff_prob import DEFAULT_MAPS, SIM_BACKENDS
+from gym_pcgrl.simulation.benchmark import win_rates
+
+RUNS = 200
+# the allowed total variation distance between the win rates of the backends
+TOLERANCE = 0.1
+
+
+@pytest.mark.parametrize("players", sorted(DEFAULT_MAPS))
+def test_numpy_backend_matches_nmmo_win_rates(players):
+    map = DEFAULT_MAPS[players]
+    num_players = len([v for v in set(map.flatten()) if v >= 4])
+    reference = win_rates(SIM_BACKENDS["nmmo"](num_players).simulate(map, RUNS), num_players)
+    rates = win_rates(SIM_BACKENDS["numpy"](num_players).simulate(map, RUNS), num_players)
+    assert 0.5 * sum(abs(a - b) for a, b in zip(rates, reference)) <= TOLERANCE
+
+
+@pytest.mark.parametrize("players", sorted(DEFAULT_MAPS))
+def test_numpy_backend_is_seeded(players):
+    map = DEFAULT_MAPS[players]
+    num_players = len([v for v in set(map.flatten()) if v >= 4])
+    simulator = SIM_BACKENDS["numpy"](num_players)
+    seeds = list(range(20))
+    assert simulator.simulate(map, len(seeds), seeds=seeds) == simulator.simulate(map, len(seeds), seeds=seeds)
@@ -0,0 +1,80 @@
+import itertools
+
+import numpy as np
+import pytest
+
+from gym_pcgrl.envs.helper import get_range_reward
+from gym_pcgrl.envs.probs.nmmo_gen_prob import NMMOGenNPlayers
+
+"""
+The players-connected stat of NMMOGenNPlayers, one region labeling of the map, against the
+pairwise connected() searches it replaced
+"""
+
+TRIALS = 500
+TILE_PROBS = [0.4, 0.25, 0.1, 0.15, 0.1]
+
+
+def random_maps(num_players, seed=0):
+    rng = np.random.default_rng(seed)
+    while True:
+        m = rng.choice(5, size=(6, 6), p=TILE_PROBS)
+        if (m == 4).sum() == num_players:
+            yield m
+
+
+def reference_players_connected(prob, m):
+    players_y, players_x = np.where(np.array(m) == 4)
+    players = list(zip(players_x, players_y))
+    if len(players) != prob.num_players:
+        return 0
+    return sum(prob.connected(players[a], players[b], m) for a, b in itertools.combinations(range(len(players)), 2))
+
+
+def baseline_players_connected(prob, m):
+    # the three searches of the original implementation, only defined for 3 players
+    players_y, players_x = np.where(np.array(m) == 4)
+    if len(players_y) != prob.num_players:
+        return 0
+    return (prob.connected((players_x[0], players_y[0]), (players_x[1], players_y[1]), m) +
+            prob.connected((players_x[0], players_y[0]), (players_x[2], players_y[2]), m) +
+            prob.connected((players_x[2], players_y[2]), (players_x[1], players_y[1]), m))
+
+
+def baseline_reward(prob, new_stats, old_stats):
+    rewards = {
+        "num-players": get_range_reward(new_stats["num-players"], old_stats["num-players"],
+                                        prob.num_players, prob.num_players),
+        "players-connected": get_range_reward(new_stats["players-connected"], old_stats["players-connected"],
+                                              prob.num_players, prob.num_players)
+    }
+    return rewards["num-players"] * 3 + rewards["players-connected"] * 2
+
+
+def test_players_connected_three_players_matches_baseline():
+    prob = NMMOGenNPlayers(num_players=3)
+    maps = random_maps(3)
+    old_stats = prob.get_stats(next(maps))
+    for _ in range(TRIALS):
+        m = next(maps)
+        stats = prob.get_stats(m)
+        assert stats["players-connected"] == baseline_players_connected(prob, m)
+        assert prob.get_reward(stats, old_stats) == baseline_reward(prob, stats, old_stats)
+        assert prob.get_episode_over(stats, old_stats) == \
+            (stats["num-players"] == 3 and stats["players-connected"] == prob.num_players)
+        old_stats = stats
+
+
+@pytest.mark.parametrize("num_players", [2, 4, 5])
+def test_players_connected_counts_all_pairs(num_players):
+    prob = NMMOGenNPlayers(num_players=num_players)
+    maps = random_maps(num_players, seed=num_players)
+    for _ in range(TRIALS):
+        m = next(maps)
+        assert prob.players_connected(m) == reference_players_connected(prob, m)
+
+
+def test_players_connected_wrong_player_count():
+    prob = NMMOGenNPlayers(num_players=3)
+    m = next(random_maps(2))
+    assert prob.players_connected(m) == 0
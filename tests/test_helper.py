@@ -0,0 +1,164 @@
+import numpy as np
+import pytest
+
+from gym_pcgrl.envs import helper
+
+"""
+The array based graph algorithms of the helper module against the loop implementations they
+replaced, on random maps of int and string tiles
+"""
+
+# the relative locations of the 8-neighbourhood, as used for get_type_grouping
+NEIGHBORHOOD = [(dx, dy) for dy in (-1, 0, 1) for dx in (-1, 0, 1) if (dx, dy) != (0, 0)]
+TRIALS = 300
+SIZES = (1, 2, 6, 11)
+
+
+def reference_tile_locations(map, tile_values):
+    tiles = {}
+    for t in tile_values:
+        tiles[t] = []
+    for y in range(len(map)):
+        for x in range(len(map[y])):
+            tiles[map[y][x]].append((x, y))
+    return tiles
+
+
+def reference_group_value(map, x, y, types, relLocs):
+    result = 0
+    for l in relLocs:
+        nx, ny = x + l[0], y + l[1]
+        if nx < 0 or ny < 0 or nx >= len(map[0]) or ny >= len(map):
+            continue
+        if map[ny][nx] in types:
+            result += 1
+    return result
+
+
+def reference_type_grouping(map, types, relLocs, min, max):
+    result = 0
+    for y in range(len(map)):
+        for x in range(len(map[y])):
+            if map[y][x] in types:
+                value = reference_group_value(map, x, y, types, relLocs)
+                if value >= min and value <= max:
+                    result += 1
+    return result
+
+
+def reference_changes(map, vertical=False):
+    start_y = 0
+    start_x = 0
+    if vertical:
+        start_y = 1
+    else:
+        start_x = 1
+    value = 0
+    for y in range(start_y, len(map)):
+        for x in range(start_x, len(map[y])):
+            same = False
+            if vertical:
+                same = map[y][x] == map[y - 1][x]
+            else:
+                same = map[y][x] == map[y][x - 1]
+            if not same:
+                value += 1
+    return value
+
+
+def reference_flood_fill(x, y, color_map, map, color_index, passable_values):
+    num_tiles = 0
+    queue = [(x, y)]
+    while len(queue) > 0:
+        (cx, cy) = queue.pop(0)
+        if color_map[cy][cx] != -1 or map[cy][cx] not in passable_values:
+            continue
+        num_tiles += 1
+        color_map[cy][cx] = color_index
+        for (dx, dy) in [(-1, 0), (1, 0), (0, -1), (0, 1)]:
+            nx, ny = cx + dx, cy + dy
+            if nx < 0 or ny < 0 or nx >= len(map[0]) or ny >= len(map):
+                continue
+            queue.append((nx, ny))
+    return num_tiles
+
+
+def reference_num_regions(map, map_locations, passable_values):
+    empty_tiles = helper._get_certain_tiles(map_locations, passable_values)
+    region_index = 0
+    color_map = np.full((len(map), len(map[0])), -1)
+    for (x, y) in empty_tiles:
+        num_tiles = reference_flood_fill(x, y, color_map, map, region_index + 1, passable_values)
+        if num_tiles > 0:
+            region_index += 1
+        else:
+            continue
+    return region_index
+
+
+def reference_dikjstra(x, y, map, passable_values):
+    dikjstra_map = np.full((len(map), len(map[0])), -1)
+    visited_map = np.zeros((len(map), len(map[0])))
+    queue = [(x, y, 0)]
+    while len(queue) > 0:
+        (cx, cy, cd) = queue.pop(0)
+        if map[cy][cx] not in passable_values or (dikjstra_map[cy][cx] >= 0 and dikjstra_map[cy][cx] <= cd):
+            continue
+        visited_map[cy][cx] = 1
+        dikjstra_map[cy][cx] = cd
+        for (dx, dy) in [(-1, 0), (1, 0), (0, -1), (0, 1)]:
+            nx, ny = cx + dx, cy + dy
+            if nx < 0 or ny < 0 or nx >= len(map[0]) or ny >= len(map):
+                continue
+            queue.append((nx, ny, cd + 1))
+    return dikjstra_map, visited_map
+
+
+def reference_longest_path(map, map_locations, passable_values):
+    empty_tiles = helper._get_certain_tiles(map_locations, passable_values)
+    final_visited_map = np.zeros((len(map), len(map[0])))
+    final_value = 0
+    for (x, y) in empty_tiles:
+        if final_visited_map[y][x] > 0:
+            continue
+        dikjstra_map, visited_map = reference_dikjstra(x, y, map, passable_values)
+        final_visited_map += visited_map
+        (my, mx) = np.unravel_index(np.argmax(dikjstra_map, axis=None), dikjstra_map.shape)
+        dikjstra_map, _ = reference_dikjstra(mx, my, map, passable_values)
+        max_value = np.max(dikjstra_map)
+        if max_value > final_value:
+            final_value = max_value
+    return final_value
+
+
+def random_cases(seed=0):
+    rng = np.random.default_rng(seed)
+    for trial in range(TRIALS):
+        tiles = [0, 1, 2, 3] if trial % 2 == 0 else ["grass", "forest", "stone", "water"]
+        passable = tiles[:2]
+        map = rng.choice(np.array(tiles), size=(int(rng.choice(SIZES)),) * 2)
+        if map.dtype.kind == "U":
+            # like the string maps of the envs
+            map = map.tolist()
+        x, y = (int(v) for v in rng.integers(len(map), size=2))
+        low, high = sorted(int(v) for v in rng.integers(0, 9, size=2))
+        map_locations = reference_tile_locations(map, tiles)
+        yield {"get_tile_locations": ((map, tiles), reference_tile_locations),
+               "get_type_grouping": ((map, passable, NEIGHBORHOOD, low, high), reference_type_grouping),
+               "get_changes": ((map, trial % 4 < 2), reference_changes),
+               "calc_num_regions": ((map, map_locations, passable), reference_num_regions),
+               "run_dikjstra": ((x, y, map, passable), reference_dikjstra),
+               "calc_longest_path": ((map, map_locations, passable), reference_longest_path)}
+
+
+@pytest.mark.parametrize("name", ["get_tile_locations", "get_type_grouping", "get_changes", "calc_num_regions",
+                                  "run_dikjstra", "calc_longest_path"])
+def test_helper_matches_reference(name):
+    for cases in random_cases():
+        args, reference = cases[name]
+        expected, actual = reference(*args), getattr(helper, name)(*args)
+        if isinstance(expected, tuple):
+            for e, a in zip(expected, actual):
+                np.testing.assert_array_equal(a, e)
+        else:
+            assert actual == expected
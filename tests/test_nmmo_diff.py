@@ -0,0 +1,26 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from gym_pcgrl.envs.probs.nmmo_diff_prob import DEFAULT_MAPS, NMMODiff
+
+"""
+The execution modes of NMMODiff that depend on threads, forking must never happen outside the
+main thread
+"""
+
+
+def test_fork_refuses_speculation():
+    with pytest.raises(ValueError):
+        NMMODiff(sim_fork=True, sim_speculative=True)
+
+
+def test_fork_only_on_main_thread(monkeypatch):
+    prob = NMMODiff(sim_fork=True, sim_runs=4)
+    if not prob.sim_config.fork:
+        pytest.skip("forking is not supported on this platform")
+    monkeypatch.setattr(prob, "run_forked", lambda map, seeds: "forked")
+    monkeypatch.setattr(prob, "simulate_winner", lambda idx, seed=None: [1])
+    assert prob.run_simulations(DEFAULT_MAPS[2], 4) == "forked"
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        assert executor.submit(prob.run_simulations, DEFAULT_MAPS[2], 4).result() == [[1]] * 4
@@ -0,0 +1,47 @@
+import pickle
+
+import pytest
+
+from gym_pcgrl.simulation.profiles import SIM_PROFILES, SYSTEMS, profile_config
+
+
+class BaseConfig:
+    PLAYER_N = 2
+
+
+for _system in SYSTEMS:
+    setattr(BaseConfig, f"{_system}_SYSTEM_ENABLED", True)
+
+
+def flags(config):
+    return {system: getattr(config, f"{system}_SYSTEM_ENABLED") for system in SYSTEMS}
+
+
+@pytest.mark.parametrize("profile", list(SIM_PROFILES))
+def test_profile_config_round_trip(profile):
+    config = profile_config(BaseConfig, profile)
+    instance = config()
+    instance.MAP_NP = [[1, 2], [3, 4]]
+
+    restored = pickle.loads(pickle.dumps(instance))
+    assert type(restored) is config
+    assert flags(restored) == flags(instance)
+    assert restored.MAP_NP == instance.MAP_NP
+    assert pickle.loads(pickle.dumps(config)) is config
+
+
+@pytest.mark.parametrize("profile", list(SIM_PROFILES))
+def test_profile_config_enables_only_the_profile_systems(profile):
+    systems = SIM_PROFILES[profile]
+    expected = {system: systems is None or system in systems for system in SYSTEMS}
+    assert flags(profile_config(BaseConfig, profile)) == expected
+
+
+@pytest.mark.parametrize("profile", list(SIM_PROFILES))
+def test_sim_config_round_trip(profile):
+    from gym_pcgrl.envs.probs.nmmo_diff_prob import ConfigSim
+
+    instance = profile_config(ConfigSim, profile)()
+    restored = pickle.loads(pickle.dumps(instance))
+    assert type(restored) is type(instance)
+    assert flags(restored) == flags(instance)
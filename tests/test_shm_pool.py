@@ -0,0 +1,57 @@
+import os
+import time
+
+import numpy as np
+import pytest
+
+from gym_pcgrl.simulation.shm import SharedMemoryPool
+
+"""
+Recovery of the shared memory pool after a failed call, the following calls must get the
+answers of their own slots
+"""
+
+SHAPE = (3, 3)
+GOOD = np.zeros(SHAPE)
+# the tile that makes the simulator fail in the way of its mode
+BAD = np.full(SHAPE, 9)
+
+
+class FailingSimulator:
+    def __init__(self, mode):
+        self.mode = mode
+
+    def simulate(self, map, runs, seeds=None):
+        if map[0][0] == 9:
+            if self.mode == "die":
+                os._exit(3)
+            if self.mode == "hang":
+                time.sleep(60)
+            raise KeyError("bad tile")
+        return [[1 + s % 2] for s in (seeds or [0] * runs)]
+
+
+@pytest.fixture
+def make_pool():
+    pools = []
+
+    def make(mode, **kwargs):
+        pool = SharedMemoryPool(FailingSimulator, (mode,), 2, SHAPE, max_runs=2, **kwargs)
+        pool.POLL_INTERVAL = 0.1
+        pools.append(pool)
+        return pool
+    yield make
+    for pool in pools:
+        pool.close()
+
+
+@pytest.mark.parametrize("mode, error, kwargs", [("die", RuntimeError, {}),
+                                                 ("hang", TimeoutError, {"timeout": 0.5}),
+                                                 ("raise", RuntimeError, {})])
+def test_simulate_many_after_failure(make_pool, mode, error, kwargs):
+    pool = make_pool(mode, **kwargs)
+    with pytest.raises(error):
+        pool.simulate_many([GOOD, BAD, GOOD, GOOD], 6)
+    seeds = [list(range(6)), list(range(1, 7))]
+    assert pool.simulate_many([GOOD, GOOD], 6, seeds) == [[[1 + s % 2] for s in m] for m in seeds]
+    assert sorted(pool._free) == list(range(pool.ring.spec[0]))
@@ -0,0 +1,38 @@
+from dataclasses import fields
+
+import pytest
+
+from gym_pcgrl.simulation.config import SimulationConfig
+
+# a value different from the default for every setting
+CHANGED = {"runs": 20, "backend": "numpy", "profile": "forage_only", "fork": True,
+           "symmetry": True, "early_stop": True, "batch": 4, "confidence": 0.9, "crn": True, "precheck": True,
+           "precheck_symmetric": True, "seed": 1, "processes": 4, "transport": "shm", "scheduler": "process",
+           "fork_children": 2, "cache": 16, "cache_path": "cache", "speculative": True}
+
+
+def test_every_setting_has_a_changed_value():
+    assert {f.name for f in fields(SimulationConfig)} == set(CHANGED)
+
+
+@pytest.mark.parametrize("name", sorted(CHANGED))
+def test_keyed_settings_change_the_cache_key(name):
+    config = SimulationConfig()
+    keyed = next(f for f in fields(SimulationConfig) if f.name == name).metadata.get("key", True)
+    assert (config.replace(**{name: CHANGED[name]}).cache_key() != config.cache_key()) == keyed
+
+
+def test_from_kwargs_takes_the_sim_kwargs():
+    config = SimulationConfig.from_kwargs({"sim_runs": 20, "sim_crn": True, "width": 6})
+    assert config == SimulationConfig(runs=20, crn=True)
+    assert SimulationConfig.from_kwargs({"sim_batch": 4}, config) == SimulationConfig(runs=20, crn=True, batch=4)
+
+
+def test_from_kwargs_rejects_unknown_settings():
+    with pytest.raises(TypeError):
+        SimulationConfig.from_kwargs({"sim_rnus": 20})
+
+
+def test_unknown_transport():
+    with pytest.raises(ValueError):
+        SimulationConfig(transport="tcp")
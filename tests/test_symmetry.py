@@ -0,0 +1,55 @@
+import itertools
+from collections import Counter
+
+import numpy as np
+import pytest
+
+from gym_pcgrl.simulation.analyzer import StaticAnalyzer
+from gym_pcgrl.simulation.forage import ForageSimulator
+from gym_pcgrl.simulation.symmetry import PLAYER_OFFSET, canonical_map, remap_winners
+
+"""
+Winners simulated on the canonical map and remapped with its player permutation against the
+winners of the original map, in particular for draws with more than two players
+"""
+
+# three players walled in on grass, no forest and no water, so all of them starve at once
+STARVE_MAP = np.array([[2, 2, 2, 2, 2, 2],
+                       [2, 4, 0, 2, 6, 2],
+                       [2, 2, 2, 2, 2, 2],
+                       [2, 0, 2, 2, 2, 2],
+                       [2, 5, 2, 2, 2, 2],
+                       [2, 2, 2, 2, 2, 2]])
+
+
+def relabeled_maps(map, num_players):
+    for ids in itertools.permutations(range(num_players)):
+        relabeled = map.copy()
+        for old, new in enumerate(ids):
+            relabeled[map == PLAYER_OFFSET + old] = PLAYER_OFFSET + new
+        yield relabeled
+
+
+def counts(results):
+    return [Counter(winners) for winners in results]
+
+
+@pytest.mark.parametrize("perm", list(itertools.permutations([1, 2, 3])))
+def test_remap_keeps_a_draw(perm):
+    assert counts(remap_winners([[1, 2, 3], [2]], list(perm))) == counts([[1, 2, 3], [perm[1]]])
+
+
+def test_relabeled_draw_three_players():
+    analyzer = StaticAnalyzer(3)
+    for map in relabeled_maps(STARVE_MAP, 3):
+        sim_map, perm = canonical_map(map, 3)
+        assert counts(remap_winners(analyzer.analyze(sim_map, 4), perm)) == counts(analyzer.analyze(map, 4))
+        assert counts(analyzer.analyze(map, 4)) == [Counter([1, 2, 3])] * 4
+
+
+def test_relabeled_draw_three_players_simulated():
+    simulator = ForageSimulator(3)
+    for map in relabeled_maps(STARVE_MAP, 3):
+        sim_map, perm = canonical_map(map, 3)
+        results = remap_winners(simulator.simulate(sim_map, 3, seeds=[1, 2, 3]), perm)
+        assert counts(results) == counts(simulator.simulate(map, 3, seeds=[1, 2, 3]))
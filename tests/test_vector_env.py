@@ -0,0 +1,49 @@
+import numpy as np
+import pytest
+
+from gym_pcgrl.envs.pcgrl_env import PcgrlEnv
+from gym_pcgrl.envs.vector_env import VectorPcgrlEnv
+
+"""
+The envs of a VectorPcgrlEnv share one problem, every env must still get the rewards of a
+standalone PcgrlEnv playing the same episode
+"""
+
+NUM_ENVS = 3
+STEPS = 30
+KWARGS = {"prob": "nmmodiff", "rep": "swapwidelite", "sim_backend": "numpy", "sim_runs": 4, "sim_seed": 3,
+          "init_random_map": True}
+
+
+def standalone_env(i, seed, **kwargs):
+    # the i-th episode of a standalone env draws the i-th map and common random numbers seed,
+    # like the env i of the vector env on its first reset
+    env = PcgrlEnv(**KWARGS, **kwargs)
+    env.seed(seed)
+    for _ in range(i + 1):
+        env.reset()
+    return env
+
+
+@pytest.mark.parametrize("crn", [False, True])
+def test_rewards_match_standalone_envs(crn):
+    vector = VectorPcgrlEnv(NUM_ENVS, **KWARGS, sim_crn=crn)
+    vector.seed(0)
+    vector.reset()
+    envs = [standalone_env(i, 0, sim_crn=crn) for i in range(NUM_ENVS)]
+    for i, env in enumerate(envs):
+        assert np.array_equal(env._rep._map, vector.get_maps()[i])
+        assert env.get_rep_stats() == vector.get_rep_stats()[i]
+
+    rng = np.random.default_rng(0)
+    running = np.ones(NUM_ENVS, dtype=bool)
+    for _ in range(STEPS):
+        actions = rng.integers(6, size=(NUM_ENVS, 4))
+        _, rewards, dones, _ = vector.step(actions)
+        for i in np.flatnonzero(running):
+            _, reward, done = envs[i].step(actions[i])[:3]
+            assert rewards[i] == pytest.approx(reward)
+            assert dones[i] == done
+            running[i] = not done
+        if not running.any():
+            break